@@ -0,0 +1,231 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from game.engine import SimulationEngine
+from game.coverage import suggest_placements
+from game.settings import GRID_SIZE, GRID_COLS, TICK_MS
+from game.towers import TOWER_TYPES
+from game.waves import ENEMY_STATS
+
+# monte carlo balance runner: plays lots of headless games with different tower
+# placement strategies and stat overrides, spread over every core, and boils the
+# per-wave outcomes down to a short report
+#
+#   python balance.py -n 200
+#   python balance.py -n 100 --set invasive.health=60,75,90 --set meerkat.damage=4,5,6
+#   python balance.py --strategy scripted --script layout.json
+
+MAX_WAVE_TICKS = 20_000  # safety net so a stalled wave can't hang a worker
+
+
+def build_cells(engine):
+    # free cells (not on the path, a tower or under the ui) in the first
+    # GRID_COLS columns, the last ones are half hidden by the sidebar
+    return [(col, row) for col, row in engine.occupancy.free_cells() if col < GRID_COLS]
+
+
+def buy_towers(engine, cells, rng):
+    # keep buying random towers on the given cells (in order) until broke
+    for col, row in cells:
+        affordable = [name for name, cls in TOWER_TYPES.items()
+                      if engine.tower_cost(cls) <= engine.money]
+        if not affordable:
+            return
+        engine.place_tower(TOWER_TYPES[rng.choice(affordable)], col * GRID_SIZE, row * GRID_SIZE)
+
+
+def random_strategy(engine, wave, rng, script):
+    cells = build_cells(engine)
+    rng.shuffle(cells)
+    buy_towers(engine, cells, rng)
+
+
+def path_strategy(engine, wave, rng, script):
+    # hug the path, closest cells first (with a little noise so runs differ)
+    distance = engine.occupancy.path_distance
+    cells = sorted(build_cells(engine), key=lambda cell: distance[cell[1], cell[0]] + rng.random() * GRID_SIZE)
+    buy_towers(engine, cells, rng)
+
+
+def advisor_strategy(engine, wave, rng, script):
+    # whatever the placement advisor suggests for the money we have
+    for tower_class, col, row in suggest_placements(engine, engine.money):
+        engine.place_tower(tower_class, col * GRID_SIZE, row * GRID_SIZE)
+
+
+def scripted_strategy(engine, wave, rng, script):
+    # script: {"1": [["meerkat", col, row], ...], ...} placements before each wave
+    for name, col, row in script.get(str(wave + 1), []):
+        engine.place_tower(TOWER_TYPES[name], col * GRID_SIZE, row * GRID_SIZE)
+
+
+STRATEGIES = {
+    "random": random_strategy,
+    "path": path_strategy,
+    "advisor": advisor_strategy,
+    "scripted": scripted_strategy,
+}
+
+
+def parse_overrides(specs):
+    # ["invasive.health=60,75", "meerkat.damage=5"] -> list of
+    # {"invasive.health": 60, "meerkat.damage": 5} dicts, one per combination
+    axes = []
+    for spec in specs or []:
+        key, _, values = spec.partition("=")
+        name, _, stat = key.partition(".")
+        if name not in ENEMY_STATS and name not in TOWER_TYPES:
+            raise SystemExit(f"unknown enemy or tower type in --set {spec}")
+        numbers = [float(value) for value in values.split(",")]
+        axes.append([(key, int(number) if number.is_integer() else number) for number in numbers])
+    return [dict(combo) for combo in itertools.product(*axes)]
+
+
+def engine_stats(overrides):
+    enemy_stats = {name: dict(stats) for name, stats in ENEMY_STATS.items()}
+    tower_stats = {}
+    for key, value in overrides.items():
+        name, _, stat = key.partition(".")
+        if name in enemy_stats:
+            enemy_stats[name][stat] = value
+        else:
+            tower_stats.setdefault(TOWER_TYPES[name].__name__, {})[stat] = value
+    return enemy_stats, tower_stats
+
+
+def simulate(job):
+    # one full game. runs in a worker process, so only plain data goes in and out
+    overrides, strategy, seed, script = job
+    rng = random.Random(seed)
+    enemy_stats, tower_stats = engine_stats(overrides)
+    engine = SimulationEngine(enemy_stats=enemy_stats, tower_stats=tower_stats)
+    place = STRATEGIES[strategy]
+
+    waves = []
+    while engine.state == "running" and engine.wave < len(engine.waves):
+        place(engine, engine.wave, rng, script)
+        health, leaks, damage = engine.base_health, engine.leaks, dict(engine.damage_dealt)
+        ticks = engine.run_wave(MAX_WAVE_TICKS)
+        stalled = engine.wave_started  # hit the tick cap without clearing the wave
+        waves.append({
+            "cleared": engine.wave_complete and engine.state == "running",
+            "leaks": engine.leaks - leaks,
+            "base_health": max(engine.base_health, 0),
+            "health_lost": health - engine.base_health,
+            "money": engine.money,
+            "seconds": ticks * TICK_MS / 1000,
+            "damage": {name: engine.damage_dealt.get(name, 0) - damage.get(name, 0)
+                       for name in engine.damage_dealt},
+        })
+        if stalled:
+            break
+
+    spent = {}
+    for tower in engine.towers:
+        name = type(tower).__name__
+        spent[name] = spent.get(name, 0) + tower.cost
+    return {
+        "won": engine.state == "running" and engine.wave == len(engine.waves) and engine.wave_complete,
+        "waves_cleared": sum(1 for wave in waves if wave["cleared"]),
+        "waves": waves,
+        "spent": spent,
+        "seconds": engine.tick * TICK_MS / 1000,
+    }
+
+
+def aggregate(results):
+    wave_count = max(len(result["waves"]) for result in results)
+    per_wave = []
+    for index in range(wave_count):
+        played = [result["waves"][index] for result in results if len(result["waves"]) > index]
+        per_wave.append({
+            "games": len(played),
+            "leaks": float(np.mean([wave["leaks"] for wave in played])),
+            "base_health": float(np.mean([wave["base_health"] for wave in played])),
+            "money": float(np.mean([wave["money"] for wave in played])),
+        })
+
+    # damage per second for every $100 spent on a tower class
+    efficiency = {}
+    for name in {name for result in results for name in result["spent"]}:
+        rates = []
+        for result in results:
+            spent = result["spent"].get(name)
+            if spent and result["seconds"]:
+                damage = sum(wave["damage"].get(name, 0) for wave in result["waves"])
+                rates.append(damage / result["seconds"] / spent * 100)
+        efficiency[name] = float(np.mean(rates)) if rates else 0.0
+
+    return {
+        "games": len(results),
+        "win_rate": float(np.mean([result["won"] for result in results])),
+        "waves_cleared": float(np.mean([result["waves_cleared"] for result in results])),
+        "per_wave": per_wave,
+        "dps_per_100": efficiency,
+    }
+
+
+def print_report(label, summary):
+    print(f"== {label or 'defaults'}")
+    print(f"   {summary['games']} games, win rate {summary['win_rate'] * 100:.1f}%, "
+          f"{summary['waves_cleared']:.2f} waves cleared on average")
+    print("   wave  games  leaks  base hp   money")
+    for index, wave in enumerate(summary["per_wave"]):
+        print(f"   {index + 1:4d}  {wave['games']:5d}  {wave['leaks']:5.2f}  {wave['base_health']:7.1f}"
+              f"  {wave['money']:6.0f}")
+    print("   dps per $100: " + ", ".join(f"{name} {rate:.2f}"
+                                          for name, rate in sorted(summary["dps_per_100"].items())))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless games in parallel and report balance stats.")
+    parser.add_argument("-n", "--games", type=int, default=100, help="games per configuration")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="random")
+    parser.add_argument("--script", help="json placements for the scripted strategy")
+    parser.add_argument("--set", action="append", metavar="TYPE.STAT=V1,V2",
+                        help="override an enemy or tower stat, several values are swept (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--json", metavar="FILE", help="also write the aggregated results here")
+    args = parser.parse_args(argv)
+
+    script = {}
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+    elif args.strategy == "scripted":
+        parser.error("--strategy scripted needs --script")
+
+    configs = parse_overrides(args.set)
+    jobs = [(overrides, args.strategy, args.seed + game, script)
+            for overrides in configs for game in range(args.games)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(simulate, jobs, chunksize=max(1, len(jobs) // (args.jobs * 8))))
+    elapsed = time.perf_counter() - start
+
+    report = []
+    for index, overrides in enumerate(configs):
+        chunk = results[index * args.games:(index + 1) * args.games]
+        label = " ".join(f"{key}={value:g}" for key, value in overrides.items())
+        summary = aggregate(chunk)
+        print_report(label, summary)
+        report.append({"overrides": overrides, **summary})
+
+    print(f"{len(jobs)} games in {elapsed:.1f}s on {args.jobs} worker(s)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"strategy": args.strategy, "configs": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+
+# no window needed, everything renders into the dummy video driver
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # main.py loads its assets relative to the repo
+
+import numpy as np
+import pygame
+
+from benchmarks.scenarios import place_towers, spawn_swarm
+from game.waves import WAVES
+from game.engine import create_engine
+from game.enemies import ENEMY_TYPES
+from game.profiler import FrameProfiler
+import main
+
+PHASES = ("spawn_enemy", "update_enemies", "update_towers", "draw_game")
+WAVE_TICKS = 120  # per wave preset
+SWARM_TICKS = 60
+SWARM_HEALTH = 10 ** 9  # swarms shouldn't melt away halfway through a run
+DEFAULT_OUTPUT = os.path.join("benchmarks", "latest.json")
+
+
+def wave_scenario(towers):
+    def setup(game, rng):
+        place_towers(game.engine, towers, rng)
+
+    def waves(game):
+        # every preset in turn, cleared in between so they don't pile up
+        engine = game.engine
+        for index in range(len(WAVES)):
+            engine.enemies.clear()
+            engine.wave = index
+            engine.wave_started = False
+            engine.start_wave()
+            yield WAVE_TICKS
+
+    return setup, waves
+
+
+def swarm_scenario(enemies, towers=50):
+    def setup(game, rng):
+        place_towers(game.engine, towers, rng)
+        spawn_swarm(game.engine, enemies, rng, SWARM_HEALTH)
+        # keep a trickle of spawns going so spawn_enemy has some work to do
+        game.engine.waves = [[("poacher", i * 100) for i in range(enemies)]]
+        game.engine.start_wave()
+
+    def waves(game):
+        yield SWARM_TICKS
+
+    return setup, waves
+
+
+def stress_scenario(enemies):
+    def setup(game, rng):
+        # stress mode already bred up to enemies invasives, spread along the path
+        engine = game.engine = create_engine("stress", game.path, population_cap=enemies)
+        stats = engine.wave_stats["invasive"]
+        distance = np.random.default_rng(rng.randrange(1 << 32)).uniform(0, engine.enemies.table.length, enemies)
+        engine.enemies.spawn_many(ENEMY_TYPES["invasive"], enemies, SWARM_HEALTH, stats["speed"],
+                                  stats["damage"], stats["reward"], distance)
+        place_towers(engine, 20, rng)
+        engine.start_wave()
+
+    def waves(game):
+        yield SWARM_TICKS
+
+    return setup, waves
+
+
+SCENARIOS = {
+    "waves/10-towers": wave_scenario(10),
+    "waves/50-towers": wave_scenario(50),
+    "waves/200-towers": wave_scenario(200),
+    "swarm/1k": swarm_scenario(1_000),
+    "swarm/10k": swarm_scenario(10_000),
+    "swarm/50k": swarm_scenario(50_000),
+    "stress/50k-invasive": stress_scenario(50_000),
+}
+
+
+def run_scenario(name, ticks=None, seed=0):
+    setup, waves = SCENARIOS[name]
+    game = main.Game()
+    game.state = "game"
+    game.engine.money = 10 ** 9
+    game.engine.base_health = game.engine.max_base_health = 10 ** 9
+    setup(game, random.Random(seed))
+
+    engine = game.engine
+    # step through engine.step itself so the phases can't drift from the real loop
+    profiler = FrameProfiler()
+    timings = {phase: [] for phase in PHASES}
+    enemy_counts = []
+
+    def draw():
+        game.update_effects()
+        game.draw_game()
+        pygame.display.update(game.dirty_rects.flush())
+
+    for wave_ticks in waves(game):
+        for _ in range(ticks or wave_ticks):
+            profiler.begin_frame()
+            engine.step(profiler)
+            profiler.measure("draw_game", draw)
+            profiler.end_frame()
+
+            for phase in PHASES:
+                timings[phase].append(profiler.current.get(phase, 0.0))
+            enemy_counts.append(engine.enemies.count)
+
+    result = {"ticks": len(enemy_counts), "mean_enemies": round(float(np.mean(enemy_counts)), 1)}
+    for phase, samples in timings.items():
+        samples = np.array(samples) * 1000
+        result[phase] = {
+            "mean_ms": round(float(samples.mean()), 4),
+            "p95_ms": round(float(np.percentile(samples, 95)), 4),
+            "total_ms": round(float(samples.sum()), 3),
+        }
+    return result
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    # a phase regresses when its mean got threshold (e.g. 15%) slower and the
+    # difference is big enough to not just be timer noise
+    regressions = []
+    for name, result in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            print(f"  {name:<18} (not in baseline)")
+            continue
+        for phase in PHASES:
+            new_ms = result[phase]["mean_ms"]
+            old_ms = base[phase]["mean_ms"]
+            ratio = new_ms / old_ms if old_ms else float("inf")
+            flag = ""
+            if ratio > 1 + threshold and new_ms - old_ms > min_delta_ms:
+                flag = "  REGRESSION"
+                regressions.append((name, phase, old_ms, new_ms))
+            print(f"  {name:<18} {phase:<15} {old_ms:9.3f} -> {new_ms:9.3f} ms  ({ratio:5.2f}x){flag}")
+    return regressions
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Time the game loop phases over scripted scenarios.")
+    parser.add_argument("-s", "--scenario", action="append",
+                        help="only run scenarios containing this text (repeatable)")
+    parser.add_argument("-n", "--ticks", type=int, help="ticks per run instead of the scenario default")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="where to write the json results")
+    parser.add_argument("-c", "--compare", metavar="BASELINE", help="baseline json to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown (0.15 = 15%%)")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="ignore slowdowns under this many ms")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    names = [name for name in SCENARIOS
+             if not args.scenario or any(text in name for text in args.scenario)]
+
+    results = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "scenarios": {},
+    }
+    for name in names:
+        result = run_scenario(name, args.ticks, args.seed)
+        results["scenarios"][name] = result
+        print(f"{name:<18} {result['ticks']:5d} ticks, {result['mean_enemies']:9.1f} enemies  " +
+              "  ".join(f"{phase} {result[phase]['mean_ms']:.3f}ms" for phase in PHASES))
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"comparing against {args.compare}:")
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print(f"{len(regressions)} regression(s)")
+            return 1
+        print("no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
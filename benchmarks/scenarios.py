@@ -0,0 +1,38 @@
+import random
+from game.settings import GRID_SIZE, GRID_COLS, GRID_ROWS
+from game.towers import MeerkatScout, ChameleonSniper, CrocodileChomper
+
+TOWER_CLASSES = [MeerkatScout, ChameleonSniper, CrocodileChomper]
+ENEMY_TYPES = ["poacher", "deforester", "invasive", "bulldozer"]
+
+
+def place_towers(engine, count, rng):
+    # spread towers over the grid. there are fewer cells than the biggest
+    # scenarios ask for, so after a full pass cells get doubled up
+    cells = [(col, row) for col in range(GRID_COLS) for row in range(GRID_ROWS)]
+    rng.shuffle(cells)
+    for col, row in (cells * (count // len(cells) + 1))[:count]:
+        tower_class = rng.choice(TOWER_CLASSES)
+        engine.add_tower(tower_class(col * GRID_SIZE, row * GRID_SIZE))
+    engine.layout_version += 1
+
+
+def spawn_swarm(engine, count, rng, health=None):
+    # drop count enemies at random points along the path
+    length = engine.enemies.table.length
+    for _ in range(count):
+        enemy = engine.create_enemy(rng.choice(ENEMY_TYPES))
+        enemy.distance = rng.uniform(0, length)
+        if health is not None:
+            enemy.health = health
+            enemy.max_health = health
+
+
+def build_board(towers, enemies, seed=0, engine=None):
+    from game.engine import SimulationEngine
+
+    rng = random.Random(seed)
+    engine = engine if engine is not None else SimulationEngine()
+    place_towers(engine, towers, rng)
+    spawn_swarm(engine, enemies, rng)
+    return engine
@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.scenarios import build_board
+from game.settings import GRID_SIZE
+from game.spatial import SpatialHash
+from game.targeting import batch_targets
+
+# times one targeting pass over a frozen board: every tower picks the closest
+# enemy in range, first one tower at a time, then through the spatial hash,
+# then in a single batched numpy pass
+
+TOWERS = 50
+ENEMIES = 2000
+REPEATS = 20
+
+
+def best_of(func, repeats=REPEATS):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    towers = int(sys.argv[1]) if len(sys.argv) > 1 else TOWERS
+    enemies = int(sys.argv[2]) if len(sys.argv) > 2 else ENEMIES
+    engine = build_board(towers, enemies)
+    store = engine.enemies
+    spatial = SpatialHash(GRID_SIZE)
+
+    def per_tower():
+        return [tower.find_target(store) for tower in engine.towers]
+
+    def indexed():
+        spatial.rebuild(store)
+        return [tower.find_target(store, spatial) for tower in engine.towers]
+
+    def batched():
+        return [store.views[slot] if slot >= 0 else None
+                for slot in batch_targets(engine.towers, store).tolist()]
+
+    # the plain loop is slow enough that a few runs are plenty
+    loop_time, expected = best_of(per_tower, 3)
+    spatial_time, spatial_result = best_of(indexed)
+    batch_time, batch_result = best_of(batched)
+
+    print(f"{towers} towers x {enemies} enemies, best of {REPEATS}")
+    print(f"  per-tower loop  {loop_time * 1000:8.3f} ms")
+    print(f"  spatial hash    {spatial_time * 1000:8.3f} ms  ({loop_time / spatial_time:5.1f}x)")
+    print(f"  batched numpy   {batch_time * 1000:8.3f} ms  ({loop_time / batch_time:5.1f}x)")
+
+    same = all(a is b for a, b in zip(expected, spatial_result)) and \
+        all(a is b for a, b in zip(expected, batch_result))
+    print("  targets match:", same)
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
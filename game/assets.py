@@ -0,0 +1,78 @@
+import time
+import pygame
+
+
+class AssetManager:
+    # fonts and images, loaded the first time something asks for them and kept
+    # for the rest of the process, so resetting the game never reloads a thing.
+    # scaled copies are cached next to the originals
+    def __init__(self):
+        self.fonts = {}  # (name, size) -> font
+        self.images = {}  # (path, size) -> surface, size None for the original
+        self.load_times = {}  # what was loaded -> seconds it took
+
+    def font(self, name, size):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            start = time.perf_counter()
+            font = pygame.font.Font(name, size)
+            self.fonts[key] = font
+            self.load_times[f"font {name or 'default'} {size}"] = time.perf_counter() - start
+        return font
+
+    def image(self, path, size=None):
+        # needs a display mode to be set, images are converted for fast blits
+        key = (path, size)
+        image = self.images.get(key)
+        if image is None:
+            original = None if size is None else self.image(path)  # timed on its own
+            start = time.perf_counter()
+            if size is None:
+                image = pygame.image.load(path).convert_alpha()
+            else:
+                image = pygame.transform.scale(original, size)
+            self.images[key] = image
+            self.load_times[f"image {path} {size or ''}".rstrip()] = time.perf_counter() - start
+        return image
+
+    def clear(self):
+        self.fonts.clear()
+        self.images.clear()
+
+
+ASSETS = AssetManager()
+
+
+class StartupTimer:
+    # wall time between named points of startup, up to the first frame on screen
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.marks = []  # (name, seconds since start)
+        self.finished = False
+
+    def mark(self, name):
+        # later games in the same process don't count as startup
+        if not self.finished:
+            self.marks.append((name, time.perf_counter() - self.start))
+
+    def finish(self, name="first frame"):
+        self.mark(name)
+        self.finished = True
+
+    def total(self):
+        return self.marks[-1][1] if self.marks else 0.0
+
+    def report(self, load_times=None):
+        # load_times (AssetManager.load_times) adds what each asset cost, slowest first
+        parts = []
+        previous = 0.0
+        for name, at in self.marks:
+            parts.append(f"{name} {(at - previous) * 1000:.1f}ms")
+            previous = at
+        report = f"startup {self.total() * 1000:.1f}ms to first frame: " + ", ".join(parts)
+        if load_times:
+            slowest = sorted(load_times.items(), key=lambda item: item[1], reverse=True)
+            report += (f"\n  {len(slowest)} assets in {sum(load_times.values()) * 1000:.1f}ms: " +
+                       ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in slowest))
+        return report
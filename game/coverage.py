@@ -0,0 +1,102 @@
+import numpy as np
+from game.path import PathTable
+from game.towers import TOWER_TYPES
+
+SAMPLE_SPACING = 8  # pixels of path between two samples
+
+
+class CoverageMap:
+    # how much of the path each grid cell can reach. the distance from every
+    # cell centre (where a tower sits) to points sampled evenly along the path
+    # is worked out once per map, after that the coverage of a range is one
+    # comparison over that matrix and gets cached, so asking again every frame
+    # is an array lookup
+    def __init__(self, path, occupancy, spacing=SAMPLE_SPACING):
+        self.path = list(path)
+        self.shape = occupancy.flags.shape  # (rows, cols)
+        table = PathTable(self.path)
+        count = max(1, int(np.ceil(table.length / spacing)))
+        self.sample_length = table.length / count  # path each sample stands for
+        self.sample_x, self.sample_y = table.positions((np.arange(count) + 0.5) * self.sample_length)
+
+        # [cell, sample], cells in occupancy order (row * cols + col)
+        cell_x = np.broadcast_to(occupancy.center_x[None, :], self.shape).ravel()
+        cell_y = np.broadcast_to(occupancy.center_y[:, None], self.shape).ravel()
+        self.distances = np.hypot(cell_x[:, None] - self.sample_x[None, :],
+                                  cell_y[:, None] - self.sample_y[None, :]).astype(np.float32)
+        self.reaches = {}  # range -> [cell, sample] bool
+        self.lengths = {}  # range -> [row, col] pixels of path in range
+
+    def reach(self, radius):
+        # which samples a tower in each cell can hit, same <= as the targeting
+        reach = self.reaches.get(radius)
+        if reach is None:
+            reach = self.distances <= radius
+            self.reaches[radius] = reach
+        return reach
+
+    def covered(self, radius):
+        # pixels of path within radius of each cell centre, [row, col]
+        length = self.lengths.get(radius)
+        if length is None:
+            length = self.reach(radius).sum(axis=1).reshape(self.shape) * self.sample_length
+            self.lengths[radius] = length
+        return length
+
+    def heatmap(self, radius, free=None):
+        # covered path scaled to 0..1 over the whole map, 0 where free is False
+        length = self.covered(radius)
+        top = length.max()
+        values = length / top if top > 0 else np.zeros(self.shape)
+        return values if free is None else np.where(free, values, 0.0)
+
+
+def tower_value(engine, tower_class):
+    # damage a tower in each cell deals to one enemy walking past at one pixel
+    # a millisecond: time in range times damage per millisecond
+    tower = engine.build_tower(tower_class, 0, 0)
+    return engine.coverage().covered(tower.range) * tower.damage * tower.attack_speed / 1000
+
+
+def suggest_placements(engine, budget, tower_classes=None):
+    # greedy build list for budget: keep buying whichever tower/free cell pair
+    # deals the most damage per dollar until nothing affordable is left.
+    # returns [(tower class, col, row)], best first. damage stacks, so every
+    # pick only takes its cell out of the running. in mazes every pick is
+    # blocked in the flow field while planning and unblocked again at the end
+    classes = tower_classes or list(TOWER_TYPES.values())
+    free = engine.occupancy.free_mask()
+    options = [(tower_class, engine.tower_cost(tower_class), tower_value(engine, tower_class))
+               for tower_class in classes]
+
+    field = engine.field
+    standing = engine.enemy_cells() if field is not None else ()
+    updated = field.updated if field is not None else 0
+    picks = []
+    try:
+        while True:
+            best = None
+            for tower_class, cost, value in options:
+                if cost > budget or cost <= 0:
+                    continue
+                per_dollar = np.where(free, value, 0.0) / cost
+                index = int(per_dollar.argmax())
+                score = per_dollar.flat[index]
+                if score > 0 and (best is None or score > best[0]):
+                    best = (score, tower_class, cost, index)
+            if best is None:
+                return picks
+            _, tower_class, cost, index = best
+            row, col = divmod(index, free.shape[1])
+            free[row, col] = False
+            # earlier picks stay blocked while planning, so the whole list
+            # together can't wall the base off either
+            if field is not None and ((col, row) in standing or not field.block(col, row, standing)):
+                continue  # try the next best
+            budget -= cost
+            picks.append((tower_class, col, row))
+    finally:
+        if field is not None:
+            for _, col, row in picks:
+                field.unblock(col, row)
+            field.updated = updated
@@ -0,0 +1,73 @@
+import pygame
+from game.settings import RED
+
+
+class AttackLines:
+    # fading tower -> target lines. they live in a fixed-size ring buffer (the
+    # oldest line gets overwritten when it is full) and are all drawn onto one
+    # reusable alpha overlay, of which only the touched area gets cleared/blitted
+    def __init__(self, size, capacity=1024, duration=100, color=RED, width=2):
+        self.size = size
+        self.capacity = capacity
+        self.duration = duration  # milliseconds
+        self.color = color
+        self.width = width
+
+        self.starts = [None] * capacity
+        self.ends = [None] * capacity
+        self.times = [0.0] * capacity
+        self.head = 0  # slot of the oldest line
+        self.count = 0
+
+        self.overlay = None
+        self.overlay_rect = None  # part of the overlay that has lines on it
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for i in range(self.count):
+            slot = (self.head + i) % self.capacity
+            yield self.starts[slot], self.ends[slot], self.times[slot]
+
+    def add(self, start_pos, end_pos, time):
+        if self.count == self.capacity:
+            # full, drop the oldest line
+            slot = self.head
+            self.head = (self.head + 1) % self.capacity
+        else:
+            slot = (self.head + self.count) % self.capacity
+            self.count += 1
+        self.starts[slot] = start_pos
+        self.ends[slot] = end_pos
+        self.times[slot] = time
+
+    def expire(self, current_time):
+        # lines are added in time order, so the expired ones are all at the head
+        while self.count and current_time - self.times[self.head] >= self.duration:
+            self.head = (self.head + 1) % self.capacity
+            self.count -= 1
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    def draw(self, screen, current_time):
+        # returns the screen area that was drawn on (or None)
+        if self.overlay is None:
+            self.overlay = pygame.Surface(self.size, pygame.SRCALPHA)
+        if self.overlay_rect:
+            self.overlay.fill((0, 0, 0, 0), self.overlay_rect)
+
+        drawn = None
+        for start_pos, end_pos, time in self:
+            # make lines fade out
+            age = current_time - time
+            alpha = max(0, min(255, int(255 * (1 - age / self.duration))))
+            rect = pygame.draw.line(self.overlay, (*self.color, alpha), start_pos, end_pos, self.width)
+            drawn = rect if drawn is None else drawn.union(rect)
+
+        self.overlay_rect = drawn
+        if drawn:
+            screen.blit(self.overlay, drawn, drawn)
+        return drawn
@@ -1,34 +1,69 @@
-import pygame
-from abc import ABC, abstractmethod
+from abc import ABC
+from game.enemy_store import EnemyStore
+
+
+def _field(name, moves=False):
+    # expose one column of the enemy store as a plain attribute on the enemy.
+    # moves: writing it invalidates the store's cached positions and order
+    def getter(self):
+        return getattr(self.store, name)[self.slot]
+
+    def setter(self, value):
+        getattr(self.store, name)[self.slot] = value
+        if moves:
+            self.store._changed()
+
+    return property(getter, setter)
+
 
 class Enemy(ABC):
-    def __init__(self, path, health=100, speed=1, damage=10, reward=10):
+    # enemies are thin views over a row of an EnemyStore. without a shared store
+    # (e.g. a one-off enemy in a script) each enemy just gets a store of its own.
+    # once removed from its store the object goes back to the store's pool and
+    # may come back as a different enemy, hold on to a handle instead
+    __slots__ = ("path", "store", "slot", "generation", "pool_index")
+    reproduction_rate = 0.0  # chance each second to split off an offspring, see SimulationEngine.reproduce
+
+    distance = _field("distance", moves=True)
+    speed = _field("speed")
+    health = _field("health")
+    max_health = _field("max_health")
+    damage = _field("damage")
+    reward = _field("reward")
+    dead = _field("dead")
+
+    def __init__(self, path, health=100, speed=1, damage=10, reward=10, store=None):
+        if store is None:
+            store = EnemyStore(path, capacity=1)
         self.path = path
-        self.path_index = 0
-        self.x = path[0][0]
-        self.y = path[0][1]
-        self.health = health
-        self.max_health = health
-        self.speed = speed
-        self.damage = damage
-        self.reward = reward
-        self.dead = False
-        
+        self.store = store
+        store.register(self)
+        self.slot = store.add(self, health, speed, damage, reward)
+
+    @property
+    def handle(self):
+        # stable id for this particular enemy, see EnemyStore.resolve
+        return (self.generation << 32) | self.pool_index
+
+    @property
+    def x(self):
+        self.store.resolve_positions()
+        return self.store.x[self.slot]
+
+    @property
+    def y(self):
+        self.store.resolve_positions()
+        return self.store.y[self.slot]
+
+    @property
+    def path_index(self):
+        return self.store.table.segment(self.distance)
+
     def move(self):
         if self.dead:
             return
-            
-        if self.path_index < len(self.path) - 1:
-            target_x, target_y = self.path[self.path_index + 1]
-            dx = target_x - self.x
-            dy = target_y - self.y
-            distance = (dx ** 2 + dy ** 2) ** 0.5
-            
-            if distance < self.speed:
-                self.path_index += 1
-            else:
-                self.x += (dx / distance) * self.speed
-                self.y += (dy / distance) * self.speed
+
+        self.distance = min(self.distance + self.speed, self.store.table.length)
                 
     def check_death(self):
         if self.health <= 0 and not self.dead:
@@ -37,18 +72,35 @@ class Enemy(ABC):
         return False
 
 class Poacher(Enemy):
-    def __init__(self, path, health=50, speed=2, damage=5, reward=10):
-        super().__init__(path, health, speed, damage, reward)
+    __slots__ = ()
+
+    def __init__(self, path, health=50, speed=2, damage=5, reward=10, store=None):
+        super().__init__(path, health, speed, damage, reward, store)
 
 class Deforester(Enemy):
-    def __init__(self, path, health=100, speed=1, damage=10, reward=15):
-        super().__init__(path, health, speed, damage, reward)
+    __slots__ = ()
+
+    def __init__(self, path, health=100, speed=1, damage=10, reward=15, store=None):
+        super().__init__(path, health, speed, damage, reward, store)
 
 class InvasiveSpecies(Enemy):
-    def __init__(self, path, health=75, speed=3, damage=15, reward=20):
-        super().__init__(path, health, speed, damage, reward)
-        self.reproduction_rate = 0.1  # Chance to spawn new enemy
+    __slots__ = ()
+    reproduction_rate = 0.1
+
+    def __init__(self, path, health=75, speed=3, damage=15, reward=20, store=None):
+        super().__init__(path, health, speed, damage, reward, store)
 
 class Bulldozer(Enemy):
-    def __init__(self, path, health=2000, speed=0.75, damage=50, reward=80):
-        super().__init__(path, health, speed, damage, reward)
+    __slots__ = ()
+
+    def __init__(self, path, health=2000, speed=0.75, damage=50, reward=80, store=None):
+        super().__init__(path, health, speed, damage, reward, store)
+
+
+# enemy type names used in the wave files / ENEMY_STATS -> class to spawn
+ENEMY_TYPES = {
+    "poacher": Poacher,
+    "deforester": Deforester,
+    "invasive": InvasiveSpecies,
+    "bulldozer": Bulldozer,
+}
@@ -0,0 +1,270 @@
+import numpy as np
+from game.path import PathTable
+
+# every per-enemy value lives in one numpy array per field (struct of arrays), so
+# a whole swarm can be moved / damaged / culled with a handful of vector ops
+FIELDS = (
+    ("distance", np.float64),  # how far the enemy has walked (along the path unless in a maze)
+    ("speed", np.float64),
+    ("health", np.float64),
+    ("max_health", np.float64),
+    ("damage", np.int64),
+    ("reward", np.int64),
+    ("dead", np.bool_),
+    # status effects, see game/status.py. *_until is the first tick without it
+    ("slow_until", np.int64),
+    ("slow", np.float64),
+    ("dot_until", np.int64),
+    ("dot", np.float64),
+    ("dot_source", np.int64),  # TOWER_TYPES index of the tower class behind the dot
+    ("reveal_until", np.int64),
+    ("stun_until", np.int64),
+    ("reproduction", np.float64),  # the class's reproduction_rate
+    ("sequence", np.int64),  # spawn order, targeting ties go to the lowest
+)
+# x/y are derived on paths but the real positions in mazes, so they move too
+SWAPPED = tuple(name for name, _ in FIELDS) + ("x", "y")
+
+
+class EnemyStore:
+    def __init__(self, path, capacity=64):
+        self.table = path if isinstance(path, PathTable) else PathTable(path)
+        self.path = self.table.waypoints
+        self.count = 0
+        self.capacity = max(1, capacity)
+        for name, dtype in FIELDS:
+            setattr(self, name, np.zeros(self.capacity, dtype=dtype))
+        self.views = []  # slot -> enemy object looking at that slot
+
+        # every enemy object this store ever made, by handle index, plus the
+        # released ones per class waiting to be reused by the next spawn
+        self.pool = []
+        self.free = {}
+
+        # x/y and the progress order are derived from distance, and only
+        # recomputed when somebody asks for them after enemies moved
+        self.x = np.zeros(self.capacity)
+        self.y = np.zeros(self.capacity)
+        self.positions_dirty = True
+        self.orders = {}  # first / last -> slots in progress order
+        self.order_dirty = True
+
+        # slots would lose spawn order when removals swap in survivors from the
+        # end, so every enemy carries a spawn sequence number instead
+        self.next_sequence = 0
+        self.spawn_order = np.empty(0, dtype=np.int64)
+        self.spawn_order_dirty = True
+
+        # maze maps: enemies follow a FlowField instead of the path, x/y are
+        # then the real positions and distance is just how far they walked
+        self.field = None
+        self.spawn_point = self.path[0]
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(self.views[:self.count])
+
+    def __getitem__(self, slot):
+        return self.views[slot]
+
+    def _changed(self):
+        self.positions_dirty = True
+        self.order_dirty = True
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, _ in FIELDS:
+            old = getattr(self, name)
+            new = np.zeros(self.capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        for name in ("x", "y"):
+            new = np.zeros(self.capacity)
+            new[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, new)
+        self._changed()
+
+    def register(self, enemy):
+        enemy.generation = 0
+        enemy.pool_index = len(self.pool)
+        self.pool.append(enemy)
+
+    def _fill(self, slots, enemy_class, health, speed, damage, reward, distance):
+        # starting values for new enemies, slots is a slot or a slice of them
+        self.distance[slots] = distance
+        self.speed[slots] = speed
+        self.health[slots] = health
+        self.max_health[slots] = health
+        self.damage[slots] = damage
+        self.reward[slots] = reward
+        self.dead[slots] = False
+        self.slow_until[slots] = self.dot_until[slots] = self.reveal_until[slots] = self.stun_until[slots] = 0
+        self.slow[slots] = 1.0
+        self.dot[slots] = 0.0
+        self.dot_source[slots] = 0
+        self.reproduction[slots] = enemy_class.reproduction_rate
+
+    def add(self, enemy, health, speed, damage, reward, distance=0.0):
+        if self.count == self.capacity:
+            self._grow()
+
+        slot = self.count
+        self._fill(slot, type(enemy), health, speed, damage, reward, distance)
+        self.sequence[slot] = self.next_sequence
+        self.next_sequence += 1
+        if self.field is not None:
+            self.x[slot], self.y[slot] = self.spawn_point
+
+        self.views.append(enemy)
+        self.count += 1
+        self._changed()
+        self.spawn_order_dirty = True
+        return slot
+
+    def _view(self, enemy_class):
+        # a released object of that class when there is one, else a new one
+        free = self.free.get(enemy_class)
+        if free:
+            return free.pop()
+        enemy = enemy_class.__new__(enemy_class)
+        enemy.path = self.path
+        enemy.store = self
+        self.register(enemy)
+        return enemy
+
+    def spawn(self, enemy_class, health, speed, damage, reward, distance=0.0):
+        # like enemy_class(path, ..., store=self), but reuses a released object
+        # of that class when there is one
+        enemy = self._view(enemy_class)
+        enemy.slot = self.add(enemy, health, speed, damage, reward, distance)
+        return enemy
+
+    def spawn_many(self, enemy_class, count, health, speed, damage, reward, distance, x=None, y=None):
+        # count enemies of one class in one go, the columns are filled with a
+        # slice each. distance (and x/y in mazes) can be one value per enemy
+        while self.count + count > self.capacity:
+            self._grow()
+        start, end = self.count, self.count + count
+        self._fill(slice(start, end), enemy_class, health, speed, damage, reward, distance)
+        self.sequence[start:end] = np.arange(self.next_sequence, self.next_sequence + count)
+        self.next_sequence += count
+        if self.field is not None:
+            self.x[start:end] = self.spawn_point[0] if x is None else x
+            self.y[start:end] = self.spawn_point[1] if y is None else y
+
+        views = self.views
+        for slot in range(start, end):
+            enemy = self._view(enemy_class)
+            enemy.slot = slot
+            views.append(enemy)
+        self.count = end
+        self._changed()
+        self.spawn_order_dirty = True
+        return views[start:end]
+
+    def release(self, enemy):
+        # bumping the generation invalidates every handle given out so far
+        enemy.generation += 1
+        enemy.slot = -1
+        self.free.setdefault(type(enemy), []).append(enemy)
+
+    def resolve(self, handle):
+        # the live enemy a handle points at, or None if it has since been removed
+        if handle is None:
+            return None
+        enemy = self.pool[handle & 0xFFFFFFFF]
+        if enemy.generation != handle >> 32 or enemy.slot < 0:
+            return None
+        return enemy
+
+    def resolve_positions(self):
+        if self.positions_dirty and self.field is None:
+            n = self.count
+            self.x[:n], self.y[:n] = self.table.positions(self.distance[:n])
+            self.positions_dirty = False
+
+    def by_spawn(self):
+        # slots from the earliest spawned enemy to the latest
+        if self.spawn_order_dirty:
+            self.spawn_order = np.argsort(self.sequence[:self.count], kind="stable")
+            self.spawn_order_dirty = False
+        return self.spawn_order
+
+    def progress(self):
+        # how far along each enemy is, higher is closer to the base
+        if self.field is not None:
+            return self.field.progress(self)
+        return self.distance[:self.count]
+
+    def by_progress(self, last=False):
+        # slots sorted from furthest along to least (least to furthest with
+        # last), ties to the earliest spawned either way
+        if self.order_dirty:
+            self.orders = {}
+            self.order_dirty = False
+        order = self.orders.get(last)
+        if order is None:
+            spawned = self.by_spawn()
+            progress = self.progress()[spawned]
+            order = spawned[np.argsort(progress if last else -progress, kind="stable")]
+            self.orders[last] = order
+        return order
+
+    def alive_count(self):
+        return self.count - int(np.count_nonzero(self.dead[:self.count]))
+
+    def reached_end(self):
+        if self.field is not None:
+            return self.field.reached_end(self)
+        return self.distance[:self.count] >= self.table.length
+
+    def advance(self, factor=None):
+        # everyone walks speed (times factor, slows and stuns) further along
+        # the path, capped at the base
+        n = self.count
+        if n == 0:
+            return
+        speed = self.speed[:n] if factor is None else self.speed[:n] * factor
+        if self.field is not None:
+            self.field.advance(self, speed)
+            self._changed()
+            return
+        moving = ~self.dead[:n]
+        distance = self.distance[:n]
+        distance[moving] = np.minimum(distance[moving] + speed[moving], self.table.length)
+        self._changed()
+
+    def remove(self, mask):
+        # drop every enemy flagged in mask (length == count). the holes get
+        # filled with survivors from the end of the arrays, so this costs
+        # O(removed) instead of shifting everything down
+        removed = np.flatnonzero(mask)
+        if removed.size == 0:
+            return
+
+        n = self.count
+        new_count = n - removed.size
+        holes = removed[removed < new_count]
+        movers = np.setdiff1d(np.arange(new_count, n), removed, assume_unique=True)
+
+        for name in SWAPPED:
+            array = getattr(self, name)
+            array[holes] = array[movers]
+
+        views = self.views
+        for slot in removed.tolist():
+            self.release(views[slot])
+        for hole, mover in zip(holes.tolist(), movers.tolist()):
+            enemy = views[mover]
+            views[hole] = enemy
+            enemy.slot = hole
+        del views[new_count:]
+
+        self.count = new_count
+        self._changed()
+        self.spawn_order_dirty = True
+
+    def clear(self):
+        self.remove(np.ones(self.count, dtype=bool))
@@ -0,0 +1,427 @@
+import numpy as np
+from game.settings import GRID_SIZE, GRID_COLS, MAZE_ROWS, TICK_MS
+from game.enemy_store import EnemyStore
+from game.spatial import SpatialHash
+from game.targeting import batch_targets, apply_damage
+from game.status import tick_effects, damage_multipliers, apply_hits, REVEAL_BONUS
+from game.enemies import ENEMY_TYPES
+from game.spawner import WaveScheduler
+from game.tower_scheduler import TowerScheduler
+from game.flowfield import FlowField
+from game.occupancy import OccupancyGrid, TOWER, PATH
+from game.coverage import CoverageMap
+from game.waves import WAVES, ENEMY_STATS, STRESS_WAVES, STRESS_STATS, endless_waves, endless_total
+from game.towers import TOWER_TYPES
+
+MODES = ("campaign", "endless", "maze", "stress")
+SELL_REFUND = 0.5  # share of the cost you get back for selling a tower
+REPRODUCE_TICKS = round(1000 / TICK_MS)  # breeding enemies get a go once a second
+POPULATION_CAP = 150  # most breeding enemies alive at once
+STRESS_CAP = 50_000
+ENEMY_NAMES = {enemy_class: name for name, enemy_class in ENEMY_TYPES.items()}
+TOWER_CLASSES = tuple(TOWER_TYPES.values())
+TOWER_IDS = {tower_class: index for index, tower_class in enumerate(TOWER_CLASSES)}  # see apply_hits
+
+
+def create_path():
+    path = [
+        (0, 4 * GRID_SIZE),  # start
+        (8 * GRID_SIZE, 4 * GRID_SIZE),
+        (8 * GRID_SIZE, 8 * GRID_SIZE),
+        (12 * GRID_SIZE, 8 * GRID_SIZE),  # end
+    ]
+    return path
+
+
+def create_engine(mode, path=None, **options):
+    # campaign: the preset waves down the fixed path, endless: generated waves
+    # that never run out, maze: the preset waves routing around your towers,
+    # stress: invasives breeding up to tens of thousands
+    if mode == "endless":
+        options.setdefault("waves", endless_waves())
+    elif mode == "stress":
+        options.setdefault("waves", STRESS_WAVES)
+        options.setdefault("enemy_stats", STRESS_STATS)
+        options.setdefault("population_cap", STRESS_CAP)
+        options.setdefault("money", 10 ** 6)
+        options.setdefault("base_health", 10 ** 9)
+    return SimulationEngine(path, mode=mode, **options)
+
+
+def grid_cell(point):
+    return int(point[0] // GRID_SIZE), int(point[1] // GRID_SIZE)
+
+
+def scale_stats(enemy_stats, multipliers):
+    scaled = {}
+    for enemy_type, stats in enemy_stats.items():
+        scaled[enemy_type] = {name: value * multipliers.get(name, 1) for name, value in stats.items()}
+        scaled[enemy_type]["reward"] = round(scaled[enemy_type]["reward"])
+    return scaled
+
+
+class SimulationEngine:
+    # all of the game rules live here. nothing in this class touches pygame, so it
+    # can be stepped headless as fast as the cpu allows (balancing, ci, replays)
+
+    def __init__(self, path=None, waves=WAVES, money=200, base_health=100, batch_targeting=True,
+                 enemy_stats=None, tower_stats=None, mode="campaign", seed=0, population_cap=POPULATION_CAP):
+        if mode not in MODES:
+            raise ValueError(f"unknown mode {mode!r}")
+        self.mode = mode  # as create_engine was asked for, snapshots save it
+        self.path = path if path is not None else create_path()
+        # maze maps: enemies walk a flow field around the towers, from the cell
+        # the path starts in to the one it ends in. self.path is then the
+        # current route, for drawing
+        self.field = None
+        if mode == "maze":
+            self.occupancy = OccupancyGrid()
+            for point in (self.path[0], self.path[-1]):
+                self.occupancy.flag(*grid_cell(point), PATH)
+            self.field = FlowField(GRID_COLS, MAZE_ROWS, grid_cell(self.path[0]), grid_cell(self.path[-1]))
+            self.path = self.field.route()
+        else:
+            self.occupancy = OccupancyGrid(self.path)  # which cells can still be built on
+        self.coverage_map = None  # built on first use, see coverage()
+        # a list of waves (campaign) or an endless generator of (spawns, multipliers)
+        self.endless = not isinstance(waves, (list, tuple))
+        self.waves = iter(waves) if self.endless else waves
+        # balancing overrides: enemy type -> stats, tower class name -> attributes
+        self.enemy_stats = enemy_stats if enemy_stats is not None else ENEMY_STATS
+        self.wave_stats = self.enemy_stats  # stats the current wave spawns with
+        self.tower_stats = tower_stats or {}
+        # reproduction dice are drawn from (seed, tick), nothing to carry over
+        self.seed = seed
+        self.population_cap = population_cap
+
+        self.tick = 0
+        self.state = "running"  # running, won, lost
+
+        self.towers = []
+        self.layout_version = 0  # bumped whenever towers are added or removed
+        self.scheduler = TowerScheduler()  # which towers are off cooldown
+        self.enemies = EnemyStore(self.path)
+        self.enemies.field = self.field
+        self.spatial = SpatialHash(GRID_SIZE)
+        # target every ready tower in one numpy pass instead of tower by tower
+        self.batch_targeting = batch_targeting
+        self.money = money
+        self.base_health = base_health
+        self.max_base_health = base_health
+
+        # wave progress
+        self.wave = 0  # number of waves started so far
+        self.wave_started = False
+        self.spawner = WaveScheduler()  # spawns of the current wave still to come
+        self.wave_spawns = 0  # total spawns in the current wave
+        self.wave_start_time = 0
+        self.wave_complete = False
+
+        # (tower, target) pairs for every attack made during the last tick
+        self.attacks = []
+
+        # running totals, mostly for balancing runs
+        self.kills = 0
+        self.leaks = 0
+        self.damage_dealt = {}  # tower class name -> damage
+
+    @property
+    def time(self):
+        # simulated milliseconds, derived from the tick count so it never drifts
+        return self.tick * TICK_MS
+
+    def tower_cost(self, tower_class):
+        overrides = self.tower_stats.get(tower_class.__name__, {})
+        return overrides.get("cost", tower_class(0, 0).cost)
+
+    def build_tower(self, tower_class, x, y):
+        # a tower with the balancing overrides applied, not placed or paid for
+        tower = tower_class(x, y)
+        for name, value in self.tower_stats.get(tower_class.__name__, {}).items():
+            setattr(tower, name, value)
+        return tower
+
+    def coverage(self):
+        # path coverage of every cell, only rebuilt when the route changed (mazes)
+        if self.coverage_map is None or self.coverage_map.path != self.path:
+            self.coverage_map = CoverageMap(self.path, self.occupancy)
+        return self.coverage_map
+
+    def can_place(self, tower_class, grid_x, grid_y):
+        # same checks as place_tower, without placing anything
+        col, row = grid_cell((grid_x, grid_y))
+        if not self.occupancy.is_free(col, row) or self.money < self.tower_cost(tower_class):
+            return False
+        if self.field is not None:
+            standing = self.enemy_cells()
+            return (col, row) not in standing and self.field.block(col, row, standing, commit=False)
+        return True
+
+    def place_tower(self, tower_class, grid_x, grid_y):
+        # no towers on top of each other, on the path or under the ui
+        col, row = grid_cell((grid_x, grid_y))
+        if not self.occupancy.is_free(col, row):
+            return None
+
+        tower = self.build_tower(tower_class, grid_x, grid_y)
+        if self.money < tower.cost:
+            return None
+
+        if self.field is not None:
+            # can't build on top of an enemy or wall anybody off from the base
+            standing = self.enemy_cells()
+            if (col, row) in standing or not self.field.block(col, row, standing):
+                return None
+
+        self.add_tower(tower)
+        self.money -= tower.cost
+        self.layout_version += 1
+        return tower
+
+    def add_tower(self, tower):
+        self.towers.append(tower)
+        self.scheduler.add(tower)
+        self.occupancy.flag(*grid_cell((tower.x, tower.y)), TOWER)
+        if self.field is not None:
+            self.field.block(*grid_cell((tower.x, tower.y)))
+            self.path = self.field.route()
+            self.enemies.order_dirty = True  # progress comes from the field
+
+    def sell_tower(self, grid_x, grid_y):
+        # returns the refund, or None if there's no tower there
+        for tower in self.towers:
+            if tower.x == grid_x and tower.y == grid_y:
+                break
+        else:
+            return None
+
+        self.towers.remove(tower)
+        self.scheduler.remove(tower)
+        self.occupancy.unflag(*grid_cell((grid_x, grid_y)), TOWER)
+        refund = int(tower.cost * SELL_REFUND)
+        self.money += refund
+        self.layout_version += 1
+        if self.field is not None:
+            self.field.unblock(*grid_cell((grid_x, grid_y)))
+            self.path = self.field.route()
+            self.enemies.order_dirty = True
+        return refund
+
+    def enemy_cells(self):
+        store = self.enemies
+        store.resolve_positions()
+        n = store.count
+        cols = (store.x[:n] // GRID_SIZE).astype(np.int64).tolist()
+        rows = (store.y[:n] // GRID_SIZE).astype(np.int64).tolist()
+        return set(zip(cols, rows))
+
+    def start_wave(self):
+        if self.wave_started or self.state != "running":
+            return False
+
+        if self.has_more_waves():
+            if self.endless:
+                spawns, multipliers = next(self.waves)
+                self.wave_stats = scale_stats(self.enemy_stats, multipliers)
+                # streamed, so the spawner only ever holds the next one
+                self.wave_spawns = endless_total(self.wave + 1)
+            else:
+                spawns = self.waves[self.wave]
+                self.wave_spawns = len(spawns)
+            self.spawner.clear()
+            self.spawner.schedule(spawns, self.time)
+            self.wave += 1
+            self.wave_started = True
+            self.wave_complete = False
+            self.wave_start_time = self.time
+            return True
+
+        # no more waves, you win!
+        self.state = "won"
+        return False
+
+    def has_more_waves(self):
+        return self.endless or self.wave < len(self.waves)
+
+    def create_enemy(self, enemy_type):
+        stats = self.wave_stats[enemy_type]
+        return self.enemies.spawn(ENEMY_TYPES[enemy_type], stats["health"], stats["speed"],
+                                  stats["damage"], stats["reward"])
+
+    def spawn_enemy(self):
+        if not self.wave_started or self.wave_complete:
+            return
+
+        # spawn everything that is due by now, not just one enemy per tick
+        for enemy_type in self.spawner.release(self.time):
+            self.create_enemy(enemy_type)
+
+        # the wave is done once nothing is left to spawn and nothing is alive.
+        # dead enemies are culled in the tick they die, so the store count is
+        # exactly the number still alive
+        if self.spawner.empty() and self.enemies.count == 0:
+            self.wave_complete = True
+            self.wave_started = False
+
+    def reproduce(self):
+        # once a second every enemy with a reproduction_rate has that chance of
+        # splitting off one offspring right where it stands, as long as fewer
+        # than population_cap breeders are alive. the dice come from the seed
+        # and the tick, so replays and snapshots roll the same numbers
+        store = self.enemies
+        n = store.count
+        if n == 0 or self.tick % REPRODUCE_TICKS:
+            return
+        rates = store.reproduction[:n]
+        breeding = rates > 0
+        room = self.population_cap - int(np.count_nonzero(breeding))
+        breeders = np.flatnonzero(breeding & ~store.dead[:n])
+        if room <= 0 or breeders.size == 0:
+            return
+        rng = np.random.default_rng((self.seed, self.tick))
+        parents = breeders[rng.random(breeders.size) < rates[breeders]][:room]
+        if parents.size == 0:
+            return
+
+        # offspring go in per class, a batch each
+        store.resolve_positions()
+        classes = [type(enemy) for enemy in map(store.views.__getitem__, parents.tolist())]
+        for enemy_class in dict.fromkeys(classes):  # first-seen order, same every run
+            group = parents[[cls is enemy_class for cls in classes]]
+            stats = self.wave_stats[ENEMY_NAMES[enemy_class]]
+            store.spawn_many(enemy_class, group.size, stats["health"], stats["speed"], stats["damage"],
+                             stats["reward"], store.distance[group], store.x[group], store.y[group])
+
+    def enemies_remaining(self):
+        return self.wave_spawns - self.spawner.released + self.enemies.count
+
+    def update_enemies(self):
+        store = self.enemies
+        factor, bleed = tick_effects(store, self.tick)
+        store.advance(factor)
+        if bleed is not None:
+            self.record_bleed(bleed)
+
+        n = store.count
+        died = (store.health[:n] <= 0) & ~store.dead[:n]
+        store.dead[:n] |= died
+        self.money += int(store.reward[:n][died].sum())
+        self.kills += int(np.count_nonzero(died))
+
+        # remove enemies that reach the end
+        leaked = ~died & store.reached_end()
+        leak_count = int(np.count_nonzero(leaked))
+        if leak_count:
+            self.leaks += leak_count
+            self.base_health -= 10 * leak_count  # lose health when enemy reaches base
+            if self.base_health <= 0:
+                self.state = "lost"
+
+        store.remove(died | leaked)
+
+    def update_towers(self):
+        # only towers whose cooldown ran out (or that were waiting for an enemy
+        # to show up near them) get looked at
+        current_time = self.time
+        self.attacks = []
+        scheduler = self.scheduler
+        ready = scheduler.due(self.tick, self.enemies)
+        if not ready:
+            return
+        if self.batch_targeting:
+            self.update_towers_batched(current_time, ready)
+            return
+
+        store = self.enemies
+        self.spatial.rebuild(store)
+
+        # reveals count from the start of the tick, like in the batched path
+        revealed = store.reveal_until[:store.count] > self.tick
+        # every tower picks from the enemies as they were at the start of the
+        # pass, like the batched path, so "strongest" doesn't see earlier hits
+        targets = [tower.find_target(store, self.spatial) if tower.can_attack(current_time) else None
+                   for tower in ready]
+        hits = []
+        for tower, target in zip(ready, targets):
+            if target:
+                target.health -= tower.damage
+                tower.last_attack_time = current_time
+                damage = tower.damage
+                if revealed[target.slot]:
+                    target.health -= damage * (REVEAL_BONUS - 1)
+                    damage *= REVEAL_BONUS
+                self.record_attack(tower, target, damage)
+                hits.append((tower, target.slot))
+                scheduler.schedule(tower)
+            else:
+                scheduler.park(tower)
+        apply_hits(store, self.tick, hits, TOWER_IDS)
+
+    def update_towers_batched(self, current_time, ready):
+        store = self.enemies
+        scheduler = self.scheduler
+        if store.count == 0:
+            for tower in ready:
+                scheduler.park(tower)
+            return
+
+        targets = batch_targets(ready, store)
+        damage = np.fromiter((tower.damage for tower in ready), dtype=np.float64, count=len(ready))
+        damage *= damage_multipliers(store, self.tick, targets)
+        apply_damage(store, targets, damage)
+
+        hits = []
+        for tower, slot, dealt in zip(ready, targets.tolist(), damage.tolist()):
+            if slot >= 0:
+                tower.last_attack_time = current_time
+                self.record_attack(tower, store.views[slot], dealt)
+                hits.append((tower, slot))
+                scheduler.schedule(tower)
+            else:
+                scheduler.park(tower)
+        apply_hits(store, self.tick, hits, TOWER_IDS)
+
+    def record_attack(self, tower, target, damage=None):
+        tower.target = target.handle
+        self.attacks.append((tower, target))
+        name = type(tower).__name__
+        self.damage_dealt[name] = self.damage_dealt.get(name, 0) + (tower.damage if damage is None else damage)
+
+    def record_bleed(self, bleed):
+        # this tick's damage over time, credited to the tower class that applied it
+        if not bleed.any():
+            return
+        dealt = np.bincount(self.enemies.dot_source[:len(bleed)], weights=bleed, minlength=len(TOWER_CLASSES))
+        for tower_class, damage in zip(TOWER_CLASSES, dealt.tolist()):
+            if damage:
+                name = tower_class.__name__
+                self.damage_dealt[name] = self.damage_dealt.get(name, 0) + damage
+
+    def step(self, profiler=None):
+        # advance the simulation by exactly one fixed tick
+        if self.state != "running":
+            return
+        if profiler is None:
+            self.spawn_enemy()
+            self.reproduce()
+            self.update_enemies()
+            self.update_towers()
+        else:
+            profiler.measure("spawn_enemy", self.spawn_enemy)
+            profiler.measure("spawn_enemy", self.reproduce)  # offspring count as spawns
+            profiler.measure("update_enemies", self.update_enemies)
+            profiler.measure("update_towers", self.update_towers)
+        self.tick += 1
+
+    def run_wave(self, max_ticks=None):
+        # start the next wave and simulate until it is cleared or the game ends.
+        # returns the number of ticks it took
+        if not self.start_wave():
+            return 0
+
+        start_tick = self.tick
+        while self.wave_started and self.state == "running":
+            if max_ticks is not None and self.tick - start_tick >= max_ticks:
+                break
+            self.step()
+        return self.tick - start_tick
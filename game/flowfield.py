@@ -0,0 +1,237 @@
+import heapq
+from collections import deque
+import numpy as np
+from game.settings import GRID_SIZE
+
+UNREACHABLE = 1 << 30
+# neighbour order doubles as the tie break when two neighbours are equally close
+STEPS = ((1, 0), (0, 1), (0, -1), (-1, 0))
+
+
+class FlowField:
+    # breadth-first distance (in cells) from every grid cell to the base, with
+    # tower cells blocked. every enemy walks towards the centre of the
+    # neighbouring cell that is closest to the base, so the whole swarm shares
+    # one field and nobody runs a pathfinder of their own. placing or removing a
+    # tower only redoes the cells whose distance actually changes
+    def __init__(self, cols, rows, spawn, base, cell_size=GRID_SIZE):
+        self.cols = cols
+        self.rows = rows
+        self.cell_size = cell_size
+        size = cols * rows
+        self.spawn = self.cell(*spawn)
+        self.base = self.cell(*base)
+
+        self.neighbours = []
+        for index in range(size):
+            col, row = index % cols, index // cols
+            self.neighbours.append([(row + dy) * cols + col + dx for dx, dy in STEPS
+                                    if 0 <= col + dx < cols and 0 <= row + dy < rows])
+        self.blocked = [False] * size
+        self.dist = [UNREACHABLE] * size
+        self.updated = 0  # cells the last change had to recompute
+
+        # where an enemy standing in each cell heads next (its own centre when
+        # the cell is the base, blocked or cut off)
+        self.next = np.arange(size)
+        centers = (np.arange(cols) + 0.5) * cell_size
+        self.center_x = np.tile(centers, rows)
+        self.center_y = np.repeat((np.arange(rows) + 0.5) * cell_size, cols)
+        self.target_x = self.center_x.copy()
+        self.target_y = self.center_y.copy()
+
+        self.rebuild()
+
+    def __len__(self):
+        return self.cols * self.rows
+
+    def cell(self, col, row):
+        return row * self.cols + col
+
+    def contains(self, col, row):
+        return 0 <= col < self.cols and 0 <= row < self.rows
+
+    def distance(self, col, row):
+        return self.dist[self.cell(col, row)]
+
+    def rebuild(self):
+        # the whole field from scratch
+        dist = [UNREACHABLE] * len(self)
+        dist[self.base] = 0
+        queue = deque([self.base])
+        while queue:
+            current = queue.popleft()
+            for cell in self.neighbours[current]:
+                if not self.blocked[cell] and dist[cell] == UNREACHABLE:
+                    dist[cell] = dist[current] + 1
+                    queue.append(cell)
+        self.dist = dist
+        self.updated = len(self)
+        self._directions(range(len(self)))
+
+    def block(self, col, row, keep=(), commit=True):
+        # put a tower on a cell. refused (False, field untouched) when it would
+        # cut the spawn or any cell in keep (where enemies stand) off the base.
+        # commit=False only asks whether it would be allowed
+        if not self.contains(col, row):
+            return True
+        cell = self.cell(col, row)
+        if self.blocked[cell]:
+            return True
+        if cell in (self.spawn, self.base):
+            return False
+
+        self.blocked[cell] = True
+        old = self._raise(cell)
+        cut_off = [index for index in [self.spawn] + [self.cell(*c) for c in keep if self.contains(*c)]
+                   if self.dist[index] == UNREACHABLE]
+        if cut_off or not commit:
+            for index, value in old.items():
+                self.dist[index] = value
+            self.blocked[cell] = False
+            return not cut_off
+        self._changed(old)
+        return True
+
+    def unblock(self, col, row):
+        # a tower got removed, distances can only go down
+        if not self.contains(col, row):
+            return
+        cell = self.cell(col, row)
+        if not self.blocked[cell]:
+            return
+        self.blocked[cell] = False
+        dist = self.dist
+        dist[cell] = min((dist[n] + 1 for n in self.neighbours[cell]
+                          if not self.blocked[n] and dist[n] < UNREACHABLE), default=UNREACHABLE)
+        changed = {cell}
+        queue = deque([cell] if dist[cell] < UNREACHABLE else [])
+        while queue:
+            current = queue.popleft()
+            for n in self.neighbours[current]:
+                if not self.blocked[n] and dist[n] > dist[current] + 1:
+                    dist[n] = dist[current] + 1
+                    changed.add(n)
+                    queue.append(n)
+        self._changed(changed)
+
+    def _raise(self, blocked):
+        # a cell just got blocked. finds every cell that got its distance through
+        # it and has no other way of getting the same distance, and redoes just
+        # those from their unaffected neighbours. returns {cell: old distance}
+        dist = self.dist
+        neighbours = self.neighbours
+        old = {blocked: dist[blocked]}
+        dist[blocked] = UNREACHABLE
+        queue = deque([blocked])
+        while queue:
+            current = queue.popleft()
+            for cell in neighbours[current]:
+                value = dist[cell]
+                if cell in old or self.blocked[cell] or value != old[current] + 1:
+                    continue
+                if any(dist[n] == value - 1 and n not in old and not self.blocked[n]
+                       for n in neighbours[cell]):
+                    continue  # still has a parent at the same distance
+                old[cell] = value
+                dist[cell] = UNREACHABLE
+                queue.append(cell)
+
+        heap = []
+        for cell in old:
+            if cell == blocked:
+                continue
+            best = min((dist[n] + 1 for n in neighbours[cell]
+                        if n not in old and not self.blocked[n] and dist[n] < UNREACHABLE),
+                       default=UNREACHABLE)
+            if best < UNREACHABLE:
+                heap.append((best, cell))
+        heapq.heapify(heap)
+        while heap:
+            value, cell = heapq.heappop(heap)
+            if value >= dist[cell]:
+                continue
+            dist[cell] = value
+            for n in neighbours[cell]:
+                if n in old and not self.blocked[n] and dist[n] > value + 1:
+                    heapq.heappush(heap, (value + 1, n))
+        return old
+
+    def _changed(self, cells):
+        self.updated = len(cells)
+        touched = set(cells)
+        for cell in cells:
+            touched.update(self.neighbours[cell])
+        self._directions(touched)
+
+    def _directions(self, cells):
+        dist = self.dist
+        for cell in cells:
+            step = cell
+            if cell != self.base and not self.blocked[cell] and dist[cell] < UNREACHABLE:
+                best = dist[cell]
+                for n in self.neighbours[cell]:
+                    if not self.blocked[n] and dist[n] < best:
+                        step, best = n, dist[n]
+            self.next[cell] = step
+            self.target_x[cell] = self.center_x[step]
+            self.target_y[cell] = self.center_y[step]
+
+    def route(self):
+        # cell centres from the spawn to the base, straight runs merged
+        cell = self.spawn
+        points = [(float(self.center_x[cell]), float(self.center_y[cell]))]
+        for _ in range(len(self)):
+            step = int(self.next[cell])
+            if step == cell:
+                break
+            point = (float(self.center_x[step]), float(self.center_y[step]))
+            if len(points) >= 2:
+                (ax, ay), (bx, by) = points[-2], points[-1]
+                if (bx - ax) * (point[1] - by) == (by - ay) * (point[0] - bx):
+                    points[-1] = point
+                    cell = step
+                    continue
+            points.append(point)
+            cell = step
+        if len(points) == 1:
+            points.append(points[0])
+        return points
+
+    def cells_of(self, x, y):
+        # grid cell index of each position, -1 off the grid
+        cols = (x // self.cell_size).astype(np.int64)
+        rows = (y // self.cell_size).astype(np.int64)
+        inside = (cols >= 0) & (cols < self.cols) & (rows >= 0) & (rows < self.rows)
+        return np.where(inside, rows * self.cols + cols, -1)
+
+    def advance(self, store, speed=None):
+        # move every live enemy up to speed pixels towards its cell's target
+        n = store.count
+        if n == 0:
+            return
+        x = store.x[:n]
+        y = store.y[:n]
+        cells = self.cells_of(x, y)
+        cells = np.where(cells < 0, self.spawn, cells)
+        dx = self.target_x[cells] - x
+        dy = self.target_y[cells] - y
+        length = np.hypot(dx, dy)
+        step = np.minimum(store.speed[:n] if speed is None else speed, length)
+        step[store.dead[:n]] = 0
+        scale = np.divide(step, length, out=np.zeros(n), where=length > 0)
+        x += dx * scale
+        y += dy * scale
+        store.distance[:n] += step
+
+    def progress(self, store):
+        # how close each enemy is to the base, minus its cell's distance. the
+        # pixels it walked say nothing once a detour made the route longer
+        n = store.count
+        cells = self.cells_of(store.x[:n], store.y[:n])
+        cells = np.where(cells < 0, self.spawn, cells)
+        return -np.asarray(self.dist, dtype=np.float64)[cells]
+
+    def reached_end(self, store):
+        n = store.count
+        return self.cells_of(store.x[:n], store.y[:n]) == self.base
@@ -0,0 +1,84 @@
+import numpy as np
+from game.settings import GRID_SIZE, WINDOW_WIDTH, WINDOW_HEIGHT, SIDEBAR_WIDTH
+
+# what a cell is taken by, several can be set at once
+TOWER = 1
+PATH = 2
+RESERVED = 4  # under the sidebar or the hud
+
+PLAY_WIDTH = WINDOW_WIDTH - SIDEBAR_WIDTH
+PLAY_HEIGHT = WINDOW_HEIGHT - 100
+COLS = -(-PLAY_WIDTH // GRID_SIZE)
+ROWS = -(-WINDOW_HEIGHT // GRID_SIZE)
+
+
+class OccupancyGrid:
+    # one byte of flags per grid cell, indexed [row, col]. placement checks are
+    # a single lookup, and whole-board questions ("free cells near the path")
+    # are numpy expressions over the same array
+    def __init__(self, path=None, cols=COLS, rows=ROWS, cell_size=GRID_SIZE):
+        self.cols = cols
+        self.rows = rows
+        self.cell_size = cell_size
+        self.flags = np.zeros((rows, cols), dtype=np.uint8)
+
+        # cells whose top left corner isn't in the play area, same rule the
+        # ui uses for clicks
+        self.flags[:, np.arange(cols) * cell_size >= PLAY_WIDTH] |= RESERVED
+        self.flags[np.arange(rows) * cell_size > PLAY_HEIGHT, :] |= RESERVED
+
+        self.center_x = (np.arange(cols) + 0.5) * cell_size
+        self.center_y = (np.arange(rows) + 0.5) * cell_size
+        self.path_distance = np.full((rows, cols), np.inf)
+        if path is not None:
+            self.mark_path(path)
+
+    def mark_path(self, path, width=5):
+        # a cell is on the path when the line runs through it or along one of
+        # its edges (the path follows grid lines), corners don't count
+        px = self.center_x[None, :]
+        py = self.center_y[:, None]
+        distance = np.full((self.rows, self.cols), np.inf)
+        for (ax, ay), (bx, by) in zip(path, path[1:]):
+            dx, dy = bx - ax, by - ay
+            length_sq = dx * dx + dy * dy or 1
+            t = np.clip(((px - ax) * dx + (py - ay) * dy) / length_sq, 0, 1)
+            distance = np.minimum(distance, np.hypot(ax + t * dx - px, ay + t * dy - py))
+        self.path_distance = distance
+        self.flags[distance <= self.cell_size / 2 + width / 2] |= PATH
+
+    def contains(self, col, row):
+        return 0 <= col < self.cols and 0 <= row < self.rows
+
+    def is_free(self, col, row):
+        return self.contains(col, row) and not self.flags[row, col]
+
+    def flag(self, col, row, flag):
+        if self.contains(col, row):
+            self.flags[row, col] |= flag
+
+    def unflag(self, col, row, flag):
+        if self.contains(col, row):
+            self.flags[row, col] &= ~np.uint8(flag)
+
+    def clear(self, flag=TOWER):
+        self.flags &= ~np.uint8(flag)
+
+    def free_mask(self):
+        return self.flags == 0
+
+    def free_cells(self, mask=None):
+        # (col, row) of every free cell, optionally only where mask is set
+        free = self.free_mask() if mask is None else self.free_mask() & mask
+        rows, cols = np.nonzero(free)
+        return list(zip(cols.tolist(), rows.tolist()))
+
+    def free_near_path(self, distance):
+        # free cells whose centre is within distance of the path
+        return self.free_cells(self.path_distance <= distance)
+
+    def free_within(self, x, y, radius):
+        # free cells whose centre is within radius of (x, y)
+        dx = self.center_x[None, :] - x
+        dy = self.center_y[:, None] - y
+        return self.free_cells(dx * dx + dy * dy <= radius * radius)
@@ -0,0 +1,45 @@
+import bisect
+import numpy as np
+
+
+class PathTable:
+    # the waypoint polyline preprocessed once into a cumulative arc-length table.
+    # anything walking the path only has to remember how far along it is, x/y are
+    # looked up from the table when someone actually needs them
+    def __init__(self, waypoints):
+        self.waypoints = [tuple(point) for point in waypoints]
+        points = np.asarray(self.waypoints, dtype=np.float64)
+
+        deltas = np.diff(points, axis=0)
+        lengths = np.sqrt((deltas ** 2).sum(axis=1))
+        self.starts = points[:-1]
+        self.directions = deltas / np.where(lengths > 0, lengths, 1)[:, None]
+        self.cumulative = np.concatenate(([0.0], np.cumsum(lengths)))
+        self.length = float(self.cumulative[-1])
+        self._cumulative_list = self.cumulative.tolist()
+
+    def __len__(self):
+        return len(self.waypoints)
+
+    def segment(self, distance):
+        # index of the waypoint the segment at this distance starts from
+        index = bisect.bisect_right(self._cumulative_list, distance) - 1
+        return min(max(index, 0), len(self.waypoints) - 1)
+
+    def segments(self, distances):
+        index = np.searchsorted(self.cumulative, distances, side="right") - 1
+        return np.clip(index, 0, len(self.waypoints) - 1)
+
+    def position(self, distance):
+        index = min(self.segment(distance), len(self.waypoints) - 2)
+        along = distance - self._cumulative_list[index]
+        start_x, start_y = self.starts[index]
+        dir_x, dir_y = self.directions[index]
+        return start_x + dir_x * along, start_y + dir_y * along
+
+    def positions(self, distances):
+        index = np.minimum(self.segments(distances), len(self.waypoints) - 2)
+        along = distances - self.cumulative[index]
+        x = self.starts[index, 0] + self.directions[index, 0] * along
+        y = self.starts[index, 1] + self.directions[index, 1] * along
+        return x, y
@@ -0,0 +1,89 @@
+import struct
+from game.engine import MODES
+from game.settings import GRID_SIZE
+from game.towers import TOWER_TYPES
+
+# binary input log: a header, one fixed-size record per input the engine acted
+# on (stamped with the simulation tick it happened before), and a final record
+# with the state the game ended in so a replay can check it got the same result
+#
+#   header  magic, version, mode
+#   input   kind, tick, tower type, grid col, grid row
+#   end     0xff, tick, money, base health, waves, kills, leaks, state
+MAGIC = b"WDRL"
+VERSION = 1
+HEADER = struct.Struct("<4sBB")
+INPUT = struct.Struct("<BIBhh")
+END = struct.Struct("<IqqIIIB")
+
+STATES = ("running", "won", "lost")
+TOWER_NAMES = tuple(TOWER_TYPES)
+
+# input kinds
+SELECT = 1  # picked a tower in the sidebar (ui only, kept for bug reports)
+PLACE = 2
+START_WAVE = 3
+TARGETING = 4  # cycled the targeting mode of the tower on a cell
+SELL = 5
+FINISH = 255  # an end record follows
+
+
+def apply_input(engine, kind, tower_type, col, row):
+    # the one place inputs touch the engine, so the game and replays agree
+    if kind == PLACE:
+        return engine.place_tower(TOWER_TYPES[TOWER_NAMES[tower_type]], col * GRID_SIZE, row * GRID_SIZE)
+    if kind == START_WAVE:
+        return engine.start_wave()
+    if kind == SELL:
+        return engine.sell_tower(col * GRID_SIZE, row * GRID_SIZE)
+    if kind == TARGETING:
+        for tower in engine.towers:
+            if tower.x == col * GRID_SIZE and tower.y == row * GRID_SIZE:
+                return tower.cycle_targeting()
+    return None
+
+
+def final_state(engine):
+    return (engine.tick, engine.money, engine.base_health, engine.wave,
+            engine.kills, engine.leaks, STATES.index(engine.state))
+
+
+class InputRecorder:
+    def __init__(self, path, mode="campaign"):
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, MODES.index(mode)))
+        self.inputs = 0
+
+    def record(self, tick, kind, tower_type=0, col=0, row=0):
+        if self.file:
+            self.file.write(INPUT.pack(kind, tick, tower_type, col, row))
+            self.inputs += 1
+
+    def finish(self, engine):
+        # writes the end record and closes the log, later calls do nothing
+        if self.file:
+            self.file.write(bytes([FINISH]) + END.pack(*final_state(engine)))
+            self.file.close()
+            self.file = None
+
+
+def read_log(path):
+    # (mode, [(tick, kind, tower_type, col, row), ...], end state or None)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    magic, version, mode = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} input log")
+
+    inputs = []
+    end = None
+    offset = HEADER.size
+    while offset < len(data):
+        if data[offset] == FINISH:
+            end = END.unpack_from(data, offset + 1)
+            break
+        kind, tick, tower_type, col, row = INPUT.unpack_from(data, offset)
+        inputs.append((tick, kind, tower_type, col, row))
+        offset += INPUT.size
+    return MODES[mode], inputs, end
@@ -0,0 +1,66 @@
+import pygame
+
+
+class BackgroundCache:
+    # everything that doesn't move (grid, path, base, placed towers, sidebar and
+    # hud chrome) pre-composited onto one surface. it only gets redrawn when the
+    # key describing it changes, e.g. a tower is placed or the selection changes
+    def __init__(self, size):
+        self.size = size
+        self.surface = None
+        self.key = None
+
+    def invalidate(self):
+        self.key = None
+
+    def get(self, key, build):
+        # returns (surface, rebuilt)
+        if self.surface is None or key != self.key:
+            if self.surface is None:
+                self.surface = pygame.Surface(self.size).convert()
+            build(self.surface)
+            self.key = key
+            return self.surface, True
+        return self.surface, False
+
+
+class DirtyRects:
+    # remembers which parts of the screen got drawn over, so the next frame only
+    # has to restore those bits of the background and push them to the display.
+    # past max_rects pieces one full-screen blit is cheaper than all the small ones
+    def __init__(self, screen_rect, max_rects=500):
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.max_rects = max_rects
+        self.previous = []
+        self.current = []
+        self.full = True
+
+    def invalidate(self):
+        self.full = True
+
+    def add(self, rect):
+        if rect:
+            self.current.append(pygame.Rect(rect))
+        return rect
+
+    def extend(self, rects):
+        self.current.extend(rects)
+
+    def restore(self, screen, background, rebuilt):
+        # wipe last frame's entities by blitting the background back over them
+        if rebuilt or self.full or len(self.previous) > self.max_rects:
+            screen.blit(background, (0, 0))
+            self.full = True
+        else:
+            screen.blits([(background, rect, rect) for rect in self.previous], doreturn=False)
+
+    def flush(self):
+        # rects to hand to pygame.display.update for this frame
+        if self.full or len(self.previous) + len(self.current) > self.max_rects:
+            rects = [self.screen_rect]
+        else:
+            rects = self.previous + self.current
+        self.previous = self.current
+        self.current = []
+        self.full = False
+        return rects
@@ -0,0 +1,29 @@
+WINDOW_WIDTH = 1280
+WINDOW_HEIGHT = 768
+FPS = 60
+GRID_SIZE = 64  # size of each cell
+GRID_COLS = (WINDOW_WIDTH - 250 - 64) // GRID_SIZE
+GRID_ROWS = WINDOW_HEIGHT // GRID_SIZE
+MAZE_ROWS = (WINDOW_HEIGHT - 100) // GRID_SIZE  # rows fully above the hud
+SIDEBAR_WIDTH = 250
+
+# the simulation always advances in fixed ticks of this length, no matter how
+# fast (or whether) frames are being drawn
+TICK_MS = 1000 / FPS
+
+# fast-forward: simulation ticks per rendered frame, None runs as many as fit
+# in MAX_SPEED_BUDGET seconds of each frame
+SPEEDS = (1, 2, 4, None)
+MAX_SPEED_BUDGET = 0.012
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GREEN = (34, 139, 19)
+BROWN = (139, 69, 19)
+LIGHT_GREEN = (144, 238, 144)
+GRAY = (128, 128, 128)
+RED = (255, 0, 0)
+YELLOW = (255, 255, 0)
+BLUE = (0, 191, 255)
+PURPLE = (147, 112, 219)
+LIGHT_GRAY = (200, 200, 200)
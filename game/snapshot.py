@@ -0,0 +1,139 @@
+import struct
+import numpy as np
+from game.engine import create_engine, MODES, scale_stats
+from game.enemies import ENEMY_TYPES
+from game.towers import TOWER_TYPES, TARGETING_MODES
+from game.waves import endless_spawns, endless_multipliers, endless_total, endless_waves
+
+# packed binary snapshot of a running game, no pickle involved:
+#
+#   header   magic, version, mode
+#   engine   tick, state, money, base health (current and max), waves started,
+#            wave flags, wave start time, spawns released, kills, leaks, layout,
+#            seed, next enemy spawn sequence
+#   damage   damage dealt per tower type, in TOWER_TYPES order
+#   towers   count, then type, x, y, level, targeting, last attack time each
+#   enemies  count, a type byte each, then the store columns (status effects
+#            included) back to back
+#            (plus x and y in mazes, where they aren't derived from distance)
+#
+# spawns still to come aren't stored, the wave is rescheduled on load and the
+# ones already released are skipped, so a snapshot is a few KB at most
+MAGIC = b"WDSV"
+VERSION = 5
+HEADER = struct.Struct("<4sBB")
+ENGINE = struct.Struct("<IBqqqIBBdIIIIqq")
+TOWER = struct.Struct("<BhhBBd")
+COUNT = struct.Struct("<I")
+
+STATES = ("running", "won", "lost")
+TOWER_NAMES = tuple(TOWER_TYPES)
+TOWER_CLASSES = tuple(TOWER_TYPES.values())
+ENEMY_CLASSES = tuple(ENEMY_TYPES.values())
+COLUMNS = ("distance", "speed", "health", "max_health", "damage", "reward",
+           "slow_until", "slow", "dot_until", "dot", "dot_source", "reveal_until", "stun_until",
+           "sequence")
+DAMAGE = struct.Struct(f"<{len(TOWER_NAMES)}d")
+
+
+def save_snapshot(engine):
+    parts = [
+        HEADER.pack(MAGIC, VERSION, MODES.index(engine.mode)),
+        ENGINE.pack(engine.tick, STATES.index(engine.state), engine.money, engine.base_health,
+                    engine.max_base_health, engine.wave, engine.wave_started, engine.wave_complete,
+                    engine.wave_start_time, engine.spawner.released, engine.kills, engine.leaks,
+                    engine.layout_version, engine.seed, engine.enemies.next_sequence),
+        DAMAGE.pack(*(engine.damage_dealt.get(cls.__name__, 0) for cls in TOWER_CLASSES)),
+        COUNT.pack(len(engine.towers)),
+    ]
+    for tower in engine.towers:
+        parts.append(TOWER.pack(TOWER_CLASSES.index(type(tower)), tower.x, tower.y, tower.level,
+                                TARGETING_MODES.index(tower.targeting), tower.last_attack_time))
+
+    store = engine.enemies
+    n = store.count
+    parts.append(COUNT.pack(n))
+    parts.append(bytes(ENEMY_CLASSES.index(type(enemy)) for enemy in store))
+    for name in columns(engine.mode):
+        parts.append(getattr(store, name)[:n].tobytes())
+    return b"".join(parts)
+
+
+def columns(mode):
+    return COLUMNS + ("x", "y") if mode == "maze" else COLUMNS
+
+
+def load_snapshot(data, path=None, **options):
+    # a fresh engine in exactly the state the snapshot was taken in. options
+    # are passed on to SimulationEngine (balancing overrides and the like)
+    magic, version, mode = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} snapshot")
+    offset = HEADER.size
+
+    (tick, state, money, base_health, max_base_health, wave, wave_started, wave_complete,
+     wave_start_time, released, kills, leaks, layout_version, seed, next_sequence) = ENGINE.unpack_from(data, offset)
+    offset += ENGINE.size
+
+    mode = MODES[mode]
+    endless = mode == "endless"
+    if endless:
+        options["waves"] = endless_waves(wave + 1)
+    engine = create_engine(mode, path, seed=seed, **options)
+    engine.tick = tick
+    engine.state = STATES[state]
+    engine.money = money
+    engine.base_health = base_health
+    engine.max_base_health = max_base_health
+    engine.wave = wave
+    engine.wave_started = bool(wave_started)
+    engine.wave_complete = bool(wave_complete)
+    engine.wave_start_time = wave_start_time
+    engine.kills = kills
+    engine.leaks = leaks
+    engine.layout_version = layout_version
+
+    damage = DAMAGE.unpack_from(data, offset)
+    offset += DAMAGE.size
+    engine.damage_dealt = {cls.__name__: value for cls, value in zip(TOWER_CLASSES, damage) if value}
+
+    (tower_count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for type_index, x, y, level, targeting, last_attack_time in TOWER.iter_unpack(
+            data[offset:offset + tower_count * TOWER.size]):
+        tower = engine.build_tower(TOWER_CLASSES[type_index], x, y)
+        tower.level = level
+        tower.targeting = TARGETING_MODES[targeting]
+        tower.last_attack_time = last_attack_time
+        engine.add_tower(tower)
+    offset += tower_count * TOWER.size
+
+    # the current wave, rescheduled with its released spawns skipped
+    if wave:
+        if endless:
+            spawns = endless_spawns(wave)
+            engine.wave_stats = scale_stats(engine.enemy_stats, endless_multipliers(wave))
+            engine.wave_spawns = endless_total(wave)
+        else:
+            spawns = engine.waves[wave - 1]
+            engine.wave_spawns = len(spawns)
+        if engine.wave_started:
+            engine.spawner.schedule(spawns, wave_start_time)
+            engine.spawner.discard(released)
+    engine.spawner.released = released
+
+    (enemy_count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    types = data[offset:offset + enemy_count]
+    offset += enemy_count
+    store = engine.enemies
+    for type_index in types:
+        store.spawn(ENEMY_CLASSES[type_index], 0, 0, 0, 0)
+    for name in columns(mode):
+        column = getattr(store, name)
+        size = enemy_count * column.itemsize
+        column[:enemy_count] = np.frombuffer(data, dtype=column.dtype, count=enemy_count, offset=offset)
+        offset += size
+    store.next_sequence = next_sequence
+    store.positions_dirty = store.order_dirty = store.spawn_order_dirty = True
+    return engine
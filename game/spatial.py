@@ -0,0 +1,98 @@
+import numpy as np
+from game.settings import GRID_SIZE
+
+# cell coordinates are packed into one int64 key, offset so that enemies slightly
+# off the left/top edge still get a valid key
+KEY_OFFSET = 1 << 15
+KEY_STRIDE = 1 << 16
+
+
+class SpatialHash:
+    # uniform grid over the enemy store, rebuilt once per tick. each cell holds the
+    # (ascending) store slots of the enemies inside it, so a range query only has
+    # to look at the handful of cells a tower's range circle touches
+    def __init__(self, cell_size=GRID_SIZE):
+        self.cell_size = cell_size
+        self.store = None
+        self.cells = {}  # (col, row) -> array of store slots
+
+    def rebuild(self, store):
+        self.store = store
+        self.cells = {}
+        n = store.count
+        if n == 0:
+            return
+        store.resolve_positions()
+
+        cols = np.floor_divide(store.x[:n], self.cell_size).astype(np.int64)
+        rows = np.floor_divide(store.y[:n], self.cell_size).astype(np.int64)
+        keys = (cols + KEY_OFFSET) * KEY_STRIDE + (rows + KEY_OFFSET)
+
+        # a stable sort keeps the slots of each cell in store order
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        cell_keys, starts = np.unique(sorted_keys, return_index=True)
+        ends = np.append(starts[1:], n)
+
+        for key, start, end in zip(cell_keys.tolist(), starts.tolist(), ends.tolist()):
+            cell = (key // KEY_STRIDE - KEY_OFFSET, key % KEY_STRIDE - KEY_OFFSET)
+            self.cells[cell] = order[start:end]
+
+    def query(self, x, y, radius):
+        # store slots (ascending) of every enemy in a cell the circle overlaps
+        size = self.cell_size
+        radius_sq = radius * radius
+        found = []
+        for col in range(int((x - radius) // size), int((x + radius) // size) + 1):
+            # distance from x to the nearest edge of this column
+            nearest_x = min(max(x, col * size), (col + 1) * size)
+            dx = nearest_x - x
+            for row in range(int((y - radius) // size), int((y + radius) // size) + 1):
+                slots = self.cells.get((col, row))
+                if slots is None:
+                    continue
+                nearest_y = min(max(y, row * size), (row + 1) * size)
+                dy = nearest_y - y
+                if dx * dx + dy * dy <= radius_sq:
+                    found.append(slots)
+
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        if len(found) == 1:
+            return found[0]
+        return np.sort(np.concatenate(found))
+
+    def in_range(self, x, y, radius):
+        # (slots, squared distances) of the enemies actually within radius
+        slots = self.query(x, y, radius)
+        if slots.size == 0:
+            return slots, np.empty(0)
+
+        store = self.store
+        dx = store.x[slots] - x
+        dy = store.y[slots] - y
+        distance_sq = dx * dx + dy * dy
+        inside = distance_sq <= radius * radius
+        return slots[inside], distance_sq[inside]
+
+    def select(self, x, y, radius, mode="closest"):
+        # pick one enemy in range according to a tower targeting mode. ties go
+        # to the earliest spawned, same as batch_targets
+        slots, distance_sq = self.in_range(x, y, radius)
+        if slots.size == 0:
+            return None
+
+        store = self.store
+        if mode == "first":
+            score = -store.progress()[slots]
+        elif mode == "last":
+            score = store.progress()[slots]
+        elif mode == "strongest":
+            score = -store.health[slots]
+        else:  # closest
+            score = distance_sq
+        tied = slots[score == score.min()]
+        return store.views[tied[np.argmin(store.sequence[tied])]]
+
+    def nearest(self, x, y, radius):
+        return self.select(x, y, radius, "closest")
@@ -0,0 +1,72 @@
+import heapq
+
+
+class WaveScheduler:
+    # priority queue of upcoming spawns keyed on the simulated time they are due.
+    # every spawn that is due gets released in the same tick, so tight timings
+    # don't drift with the frame rate. lists/tuples are queued up front, any
+    # other iterable is pulled one spawn at a time (its delays must not go down)
+    def __init__(self):
+        self.queue = []  # (due_time, sequence, enemy_type, source)
+        self.sequence = 0  # keeps spawns that are due together in wave order
+        self.pending = 0  # spawns queued up but not released yet
+        self.streams = 0  # lazy waves that may still produce spawns
+        self.released = 0  # spawns handed out since the last clear
+
+    def __len__(self):
+        return self.pending
+
+    def empty(self):
+        return self.pending == 0 and self.streams == 0
+
+    def clear(self):
+        self.queue = []
+        self.pending = 0
+        self.streams = 0
+        self.released = 0
+
+    def _push(self, due_time, enemy_type, source=None):
+        heapq.heappush(self.queue, (due_time, self.sequence, enemy_type, source))
+        self.sequence += 1
+        self.pending += 1
+
+    def _pull(self, start_time, stream):
+        for enemy_type, delay in stream:
+            self._push(start_time + delay, enemy_type, (start_time, stream))
+            return
+        self.streams -= 1
+
+    def schedule(self, wave, start_time):
+        # wave is a sequence or iterable of (enemy_type, delay_ms) pairs
+        if isinstance(wave, (list, tuple)):
+            for enemy_type, delay in wave:
+                self._push(start_time + delay, enemy_type)
+        else:
+            self.streams += 1
+            self._pull(start_time, iter(wave))
+
+    def release(self, current_time):
+        # enemy types of every spawn due by current_time, in order
+        due = []
+        queue = self.queue
+        while queue and queue[0][0] <= current_time:
+            _, _, enemy_type, source = heapq.heappop(queue)
+            self.pending -= 1
+            due.append(enemy_type)
+            if source is not None:
+                self._pull(*source)
+        self.released += len(due)
+        return due
+
+    def discard(self, count):
+        # drop the next count spawns as if they had been released. a restored
+        # snapshot reschedules its wave and skips what already came out
+        queue = self.queue
+        for _ in range(count):
+            if not queue:
+                break
+            _, _, _, source = heapq.heappop(queue)
+            self.pending -= 1
+            self.released += 1
+            if source is not None:
+                self._pull(*source)
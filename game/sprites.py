@@ -0,0 +1,138 @@
+import numpy as np
+import pygame
+from game.settings import GRID_SIZE, RED, GREEN, BLACK, YELLOW, BLUE, GRAY
+from game.towers import MeerkatScout, ChameleonSniper, CrocodileChomper
+
+TOWER_COLORS = {
+    MeerkatScout: RED,
+    ChameleonSniper: BLACK,
+    CrocodileChomper: GREEN,
+}
+ENEMY_RADIUS = 15
+BAR_WIDTH = 30
+BAR_HEIGHT = 5
+BODY_KEY = (255, 0, 255)
+# body colour by status: 0 nothing, 1 slowed, 2 stunned (+ 3 when revealed,
+# which gets a red ring)
+STATUS_COLORS = (YELLOW, BLUE, GRAY)
+# past this many enemies only one per SWARM_CELL x SWARM_CELL pixel square gets
+# drawn, they'd all be on top of each other anyway. keeps a 50k swarm to a few
+# thousand blits
+SWARM_DRAW = 2000
+SWARM_CELL = 4
+
+
+class EntityRenderer:
+    # every enemy body, tower square and health bar is drawn once into a small
+    # surface and then only blitted. health bars snap to whole pixels, so there
+    # are just BAR_WIDTH + 1 of them, and a frame's enemies go out in a single
+    # Surface.blits call
+    def __init__(self):
+        self.bodies = {}  # (enemy class, status) -> surface
+        self.towers = {}  # tower class -> surface
+        self.bars = []  # filled width in pixels -> surface
+        self.markers = {}  # placement allowed -> surface
+
+    def enemy_body(self, enemy_class, status=0):
+        key = (enemy_class, status)
+        body = self.bodies.get(key)
+        if body is None:
+            size = ENEMY_RADIUS * 2 + 1
+            # colorkeyed and run-length encoded, much cheaper to blit than
+            # per-pixel alpha
+            body = pygame.Surface((size, size)).convert()
+            body.fill(BODY_KEY)
+            pygame.draw.circle(body, STATUS_COLORS[status % 3], (ENEMY_RADIUS, ENEMY_RADIUS), ENEMY_RADIUS)
+            if status >= 3:
+                pygame.draw.circle(body, RED, (ENEMY_RADIUS, ENEMY_RADIUS), ENEMY_RADIUS, 2)
+            body.set_colorkey(BODY_KEY, pygame.RLEACCEL)
+            self.bodies[key] = body
+        return body
+
+    def tower_square(self, tower_class):
+        square = self.towers.get(tower_class)
+        if square is None:
+            square = pygame.Surface((GRID_SIZE - 10, GRID_SIZE - 10)).convert()
+            square.fill(TOWER_COLORS.get(tower_class, BLACK))
+            self.towers[tower_class] = square
+        return square
+
+    def health_bar(self, filled):
+        if not self.bars:
+            for width in range(BAR_WIDTH + 1):
+                bar = pygame.Surface((BAR_WIDTH, BAR_HEIGHT)).convert()
+                bar.fill(RED)
+                bar.fill(GREEN, (0, 0, width, BAR_HEIGHT))
+                self.bars.append(bar)
+        return self.bars[filled]
+
+    def placement_marker(self, valid):
+        marker = self.markers.get(valid)
+        if marker is None:
+            marker = pygame.Surface((GRID_SIZE, GRID_SIZE), pygame.SRCALPHA)
+            marker.fill((*(GREEN if valid else RED), 90))
+            self.markers[valid] = marker
+        return marker
+
+    def coverage_overlay(self, values):
+        # heatmap of a [row, col] array of 0..1 values, one cell per grid cell:
+        # transparent at 0, going from yellow to red and more opaque towards 1
+        rows, cols = values.shape
+        cells = pygame.Surface((cols, rows), pygame.SRCALPHA)
+        colors = pygame.surfarray.pixels3d(cells)
+        colors[..., 0] = 255
+        colors[..., 1] = (255 * (1 - values.T)).astype(np.uint8)
+        colors[..., 2] = 0
+        del colors
+        alpha = pygame.surfarray.pixels_alpha(cells)
+        alpha[...] = np.where(values.T > 0, 40 + 120 * values.T, 0).astype(np.uint8)
+        del alpha
+        return pygame.transform.scale(cells, (cols * GRID_SIZE, rows * GRID_SIZE))
+
+    def visible(self, x, y):
+        # slots of one enemy per SWARM_CELL square (whichever one wins the
+        # scatter, they look the same), in slot order
+        cols = np.clip(x // SWARM_CELL, 0, None)
+        cells = np.clip(y // SWARM_CELL, 0, None) * (int(cols.max()) + 1) + cols
+        owner = np.full(int(cells.max()) + 1, -1)
+        owner[cells] = np.arange(len(x))
+        return np.sort(owner[owner >= 0])
+
+    def draw_towers(self, surface, towers):
+        surface.blits([(self.tower_square(type(tower)), (tower.x + 5, tower.y + 5)) for tower in towers],
+                      doreturn=False)
+
+    def draw_enemies(self, screen, store, tick=0):
+        # returns the rects that were drawn on. dead enemies are culled in the
+        # tick they die, so everything in the store gets drawn. tick is the one
+        # about to run, effects that still apply to it are shown
+        n = store.count
+        if n == 0:
+            return []
+        store.resolve_positions()
+        x = store.x[:n].astype(np.int64)
+        y = store.y[:n].astype(np.int64)
+        slots = self.visible(x, y) if n > SWARM_DRAW else np.arange(n)
+        x = x[slots]
+        y = y[slots]
+        ratio = np.clip(store.health[slots] / store.max_health[slots], 0, 1)
+        filled = (ratio * BAR_WIDTH).astype(np.int64).tolist()
+        status = np.where(store.stun_until[slots] > tick, 2, np.where(store.slow_until[slots] > tick, 1, 0))
+        status = (status + 3 * (store.reveal_until[slots] > tick)).tolist()
+        self.health_bar(0)
+
+        bodies = self.bodies
+        bars = self.bars
+        views = store.views
+        body_x = (x - ENEMY_RADIUS).tolist()
+        body_y = (y - ENEMY_RADIUS).tolist()
+        bar_x = (x - BAR_WIDTH // 2).tolist()
+        bar_y = (y - 20).tolist()
+        batch = []
+        for i, slot in enumerate(slots.tolist()):
+            enemy = views[slot]
+            key = (type(enemy), status[i])
+            body = bodies.get(key) or self.enemy_body(*key)
+            batch.append((body, (body_x[i], body_y[i])))
+            batch.append((bars[filled[i]], (bar_x[i], bar_y[i])))
+        return screen.blits(batch)
@@ -0,0 +1,80 @@
+import math
+import numpy as np
+from game.settings import TICK_MS
+
+# status effects are EnemyStore columns: the tick each one runs out on, plus
+# the slow factor and the damage over time per tick. applying, ticking and
+# expiring them are a few vector ops over the whole store, so it costs the
+# same whether 10 or 10,000 enemies carry one
+SLOW = "slow"  # speed multiplier, the strongest running slow wins
+DOT = "dot"  # damage per second, the strongest running one wins
+REVEAL = "reveal"  # revealed enemies take REVEAL_BONUS times the damage
+STUN = "stun"  # doesn't move at all
+
+REVEAL_BONUS = 1.25
+
+
+def duration_ticks(ms):
+    return max(1, math.ceil(ms / TICK_MS))
+
+
+def tick_effects(store, tick):
+    # damage over time, then clear whatever ran out. returns every enemy's
+    # speed multiplier for this tick's move and the bleed damage each one
+    # took, (None, None) when the store is empty
+    n = store.count
+    if n == 0:
+        return None, None
+    burning = store.dot_until[:n] > tick
+    bleed = np.where(burning & (store.health[:n] > 0), store.dot[:n], 0.0)
+    store.health[:n] -= bleed
+    store.dot[:n][~burning] = 0.0
+
+    slowed = store.slow_until[:n] > tick
+    store.slow[:n][~slowed] = 1.0
+    factor = store.slow[:n].copy()
+    factor[store.stun_until[:n] > tick] = 0.0
+    return factor, bleed
+
+
+def damage_multipliers(store, tick, targets):
+    # per attack (targets are store slots, -1 = no target), reveal bonus or 1
+    hit = targets >= 0
+    multipliers = np.ones(len(targets))
+    multipliers[hit] = np.where(store.reveal_until[targets[hit]] > tick, REVEAL_BONUS, 1.0)
+    return multipliers
+
+
+def apply_hits(store, tick, hits, sources):
+    # hits: (tower, slot) for every attack this tick. each tower's
+    # special_ability() lists what a hit does, as (effect, ms, magnitude).
+    # effects start with the next tick's move. when one enemy gets the same
+    # effect twice the longer duration and the stronger magnitude win.
+    # sources maps tower classes to the index a dot remembers them by
+    grouped = {}
+    for tower, slot in hits:
+        source = sources[type(tower)]
+        for effect, ms, magnitude in tower.special_ability():
+            grouped.setdefault(effect, []).append((slot, tick + 1 + duration_ticks(ms), magnitude, source))
+
+    for effect, rows in grouped.items():
+        slots = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        until = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+        magnitude = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+        if effect == SLOW:
+            np.maximum.at(store.slow_until, slots, until)
+            np.minimum.at(store.slow, slots, magnitude)
+        elif effect == DOT:
+            per_tick = magnitude * TICK_MS / 1000
+            np.maximum.at(store.dot_until, slots, until)
+            np.maximum.at(store.dot, slots, per_tick)
+            # the bleed gets credited to whoever applied the strongest one
+            strongest = per_tick >= store.dot[slots]
+            source = np.fromiter((row[3] for row in rows), dtype=np.int64, count=len(rows))
+            store.dot_source[slots[strongest]] = source[strongest]
+        elif effect == REVEAL:
+            np.maximum.at(store.reveal_until, slots, until)
+        elif effect == STUN:
+            np.maximum.at(store.stun_until, slots, until)
+        else:
+            raise ValueError(f"unknown status effect {effect!r}")
@@ -0,0 +1,65 @@
+import numpy as np
+
+# cap on how many tower x enemy cells get materialised at once, so 200 towers
+# against a 50k swarm doesn't try to allocate an 80mb distance matrix
+MAX_MATRIX_CELLS = 1 << 20
+
+
+def batch_targets(towers, store):
+    # pick a target for every tower in one numpy pass. returns an array of store
+    # slots (-1 = nothing in range). every tower sees the enemies as they were at
+    # the start of the pass, which for "closest" is exactly what the old
+    # one-tower-at-a-time loop did since damage never moves anybody. enemies
+    # are lined up in spawn order, so argmin hands ties to the earliest spawned
+    n = store.count
+    targets = np.full(len(towers), -1, dtype=np.int64)
+    if n == 0 or not towers:
+        return targets
+
+    store.resolve_positions()
+    order = store.by_spawn()
+    enemy_x = store.x[order]
+    enemy_y = store.y[order]
+    center_x = np.fromiter((tower.x + 32 for tower in towers), dtype=np.float64, count=len(towers))
+    center_y = np.fromiter((tower.y + 32 for tower in towers), dtype=np.float64, count=len(towers))
+    range_sq = np.fromiter((tower.range * tower.range for tower in towers), dtype=np.float64,
+                           count=len(towers))
+
+    # lower score wins, so every mode is an argmin over the in-range enemies
+    progress = store.progress()[order]
+    mode_scores = {
+        "first": -progress,
+        "last": progress,
+        "strongest": -store.health[order],
+    }
+    modes = [tower.targeting for tower in towers]
+
+    chunk = max(1, MAX_MATRIX_CELLS // n)
+    for start in range(0, len(towers), chunk):
+        end = min(start + chunk, len(towers))
+        dx = enemy_x[None, :] - center_x[start:end, None]
+        dy = enemy_y[None, :] - center_y[start:end, None]
+        distance_sq = dx * dx + dy * dy
+        in_range = distance_sq <= range_sq[start:end, None]
+
+        for mode in set(modes[start:end]):
+            rows = np.array([i for i in range(start, end) if modes[i] == mode]) - start
+            mask = in_range[rows] if len(rows) < end - start else in_range
+            if mode in mode_scores:
+                score = np.where(mask, mode_scores[mode][None, :], np.inf)
+            else:  # closest
+                score = np.where(mask, distance_sq if mask is in_range else distance_sq[rows], np.inf)
+
+            best = np.argmin(score, axis=1)
+            found = mask[np.arange(len(rows)), best]
+            targets[rows + start] = np.where(found, order[best], -1)
+
+    return targets
+
+
+def apply_damage(store, targets, damage):
+    # scatter-add every tower's damage onto its target in one go
+    hit = targets >= 0
+    if not hit.any():
+        return
+    store.health[:store.count] -= np.bincount(targets[hit], weights=damage[hit], minlength=store.count)
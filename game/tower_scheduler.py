@@ -0,0 +1,133 @@
+import heapq
+import math
+import numpy as np
+from game.settings import GRID_SIZE, TICK_MS, WINDOW_WIDTH, WINDOW_HEIGHT
+
+# the whole window plus a spare cell, for enemies standing right on its edge
+SCHEDULER_COLS = WINDOW_WIDTH // GRID_SIZE + 1
+SCHEDULER_ROWS = WINDOW_HEIGHT // GRID_SIZE + 1
+
+
+class TowerScheduler:
+    # decides which towers get to look for a target this tick. cooling down
+    # towers sit in a min-heap keyed on the tick their cooldown runs out, so a
+    # slow tower costs nothing on the ticks in between. a ready tower that found
+    # nothing in range gets parked, and only wakes up once an enemy stands in
+    # one of the grid cells its range circle touches. which cells those are is
+    # kept as one row of booleans per tower, so parking is just a flag
+    def __init__(self, cell_size=GRID_SIZE, cols=SCHEDULER_COLS, rows=SCHEDULER_ROWS, capacity=64):
+        self.cell_size = cell_size
+        self.cols = cols
+        self.rows = rows
+        self.towers = []  # row -> tower, in placement order
+        self.index = {}  # tower -> row
+        self.cooldowns = []  # row -> ms between attacks
+        self.coverage = np.zeros((capacity, cols * rows), dtype=bool)
+        self.parked = np.zeros(capacity, dtype=bool)
+        self.heap = []  # (ready tick, row)
+        self.ready_at = {}  # row -> tick of its live heap entry
+        self.grid = np.zeros(cols * rows, dtype=bool)
+
+    def __len__(self):
+        return len(self.index)
+
+    def add(self, tower):
+        row = len(self.towers)
+        if row == len(self.parked):
+            self.coverage = np.concatenate([self.coverage, np.zeros_like(self.coverage)])
+            self.parked = np.concatenate([self.parked, np.zeros_like(self.parked)])
+        self.towers.append(tower)
+        self.cooldowns.append(0.0)
+        self.index[tower] = row
+        self.reschedule(tower)
+
+    def remove(self, tower):
+        # the row stays, it just never comes up again
+        row = self.index.pop(tower)
+        self.towers[row] = None
+        self.parked[row] = False
+        self.coverage[row] = False
+        self.ready_at.pop(row, None)
+
+    def reschedule(self, tower):
+        # call after a tower's attack speed, range or last attack time changed
+        row = self.index[tower]
+        self.cooldowns[row] = 1000 / tower.attack_speed
+        self.coverage[row] = False
+        self.coverage[row, self.range_cells(tower)] = True
+        self.parked[row] = False
+        self.schedule(tower)
+
+    def range_cells(self, tower):
+        # every grid cell the range circle overlaps (edges included, like the
+        # <= range check the targeting does)
+        size = self.cell_size
+        center_x = tower.x + size // 2
+        center_y = tower.y + size // 2
+        radius = tower.range
+        cells = []
+        for col in range(max(0, int((center_x - radius) // size)),
+                         min(self.cols - 1, int((center_x + radius) // size)) + 1):
+            nearest_x = min(max(center_x, col * size), (col + 1) * size)
+            for row in range(max(0, int((center_y - radius) // size)),
+                             min(self.rows - 1, int((center_y + radius) // size)) + 1):
+                nearest_y = min(max(center_y, row * size), (row + 1) * size)
+                if (nearest_x - center_x) ** 2 + (nearest_y - center_y) ** 2 <= radius * radius:
+                    cells.append(row * self.cols + col)
+        return cells
+
+    def ready_tick(self, row):
+        # first tick whose time passes Tower.can_attack, with the same float
+        # maths so the tower fires on exactly the tick it used to
+        cooldown = self.cooldowns[row]
+        last = self.towers[row].last_attack_time
+        tick = max(0, math.ceil((last + cooldown) / TICK_MS) - 1)
+        while tick * TICK_MS - last < cooldown:
+            tick += 1
+        return tick
+
+    def schedule(self, tower):
+        # back to cooling down after an attack
+        row = self.index[tower]
+        tick = self.ready_tick(row)
+        self.ready_at[row] = tick
+        heapq.heappush(self.heap, (tick, row))
+
+    def park(self, tower):
+        self.parked[self.index[tower]] = True
+
+    def occupied(self, store):
+        # grid cells with at least one enemy in them
+        grid = self.grid
+        grid[:] = False
+        n = store.count
+        store.resolve_positions()
+        cols = (store.x[:n] // self.cell_size).astype(np.int64)
+        rows = (store.y[:n] // self.cell_size).astype(np.int64)
+        inside = (cols >= 0) & (cols < self.cols) & (rows >= 0) & (rows < self.rows)
+        grid[rows[inside] * self.cols + cols[inside]] = True
+        return np.flatnonzero(grid)
+
+    def due(self, tick, store):
+        # towers that may attack this tick, in placement order. each of them
+        # has to be handed back through schedule() or park() afterwards
+        rows = []
+        heap = self.heap
+        ready_at = self.ready_at
+        while heap and heap[0][0] <= tick:
+            ready, row = heapq.heappop(heap)
+            if ready_at.get(row) == ready:
+                del ready_at[row]
+                rows.append(row)
+
+        if store.count:
+            parked = np.flatnonzero(self.parked[:len(self.towers)])
+            if parked.size:
+                cells = self.occupied(store)
+                woken = parked[self.coverage[np.ix_(parked, cells)].any(axis=1)]
+                self.parked[woken] = False
+                rows.extend(woken.tolist())
+
+        rows.sort()
+        towers = self.towers
+        return [towers[row] for row in rows]
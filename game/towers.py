@@ -1,6 +1,9 @@
-import pygame
-import math
 from abc import ABC, abstractmethod
+from game.status import SLOW, DOT, REVEAL, STUN
+
+# first = furthest along the path (closest to the base in mazes), last = least far along,
+# strongest = most health left, closest = nearest to the tower
+TARGETING_MODES = ("closest", "first", "last", "strongest")
 
 class Tower(ABC):
     def __init__(self, x, y):
@@ -11,41 +14,78 @@ class Tower(ABC):
         self.damage = 10
         self.attack_speed = 1.0
         self.cost = 100
-        self.target = None
+        self.target = None  # handle of the last enemy hit, see EnemyStore.resolve
+        self.targeting = "closest"
         self.last_attack_time = 0
         
     @abstractmethod
     def special_ability(self):
+        # what a hit does to the target besides damage: (effect, ms, magnitude)
+        # tuples, applied by the engine (see game/status.py)
         pass
     
-    def find_target(self, enemies):
-        closest_enemy = None
-        min_distance = float('inf')
-        
+    def cycle_targeting(self):
+        index = TARGETING_MODES.index(self.targeting)
+        self.targeting = TARGETING_MODES[(index + 1) % len(TARGETING_MODES)]
+        return self.targeting
+
+    def find_target(self, enemies, index=None):
+        center_x = self.x + 32  # add 32 to get center of tower
+        center_y = self.y + 32
+
+        # with a spatial index only the cells around the tower get looked at
+        if index is not None:
+            return index.select(center_x, center_y, self.range, self.targeting)
+
+        range_sq = self.range * self.range
+
+        if self.targeting in ("first", "last"):
+            # walk the enemies in path order and stop at the first one in range
+            if hasattr(enemies, "by_progress"):
+                order = enemies.by_progress(self.targeting == "last")
+                ordered = (enemies[slot] for slot in order.tolist())
+            else:
+                ordered = sorted(enemies, key=lambda enemy: enemy.distance,
+                                 reverse=self.targeting == "first")
+            for enemy in ordered:
+                dx = enemy.x - center_x
+                dy = enemy.y - center_y
+                if dx * dx + dy * dy <= range_sq:
+                    return enemy
+            return None
+
+        best_enemy = None
+        best_score = float('inf')
+        if hasattr(enemies, "by_spawn"):
+            enemies = [enemies[slot] for slot in enemies.by_spawn().tolist()]  # ties to the earliest spawned
+
         for enemy in enemies:
-            dx = enemy.x - (self.x + 32)  # add 32 to get center of tower
-            dy = enemy.y - (self.y + 32)
-            distance = math.sqrt(dx * dx + dy * dy)
-            
-            if distance <= self.range and distance < min_distance:
-                closest_enemy = enemy
-                min_distance = distance
+            dx = enemy.x - center_x
+            dy = enemy.y - center_y
+            distance = dx * dx + dy * dy  # squared, no need for the sqrt
+            if distance > range_sq:
+                continue
+
+            score = -enemy.health if self.targeting == "strongest" else distance
+            if score < best_score:
+                best_enemy = enemy
+                best_score = score
                 
-        return closest_enemy
+        return best_enemy
         
     def can_attack(self, current_time):
         return current_time - self.last_attack_time >= 1000 / self.attack_speed
     
-    def attack(self, current_time, enemies):
+    def attack(self, current_time, enemies, index=None):
+        # returns the enemy that got hit, or None
         if not self.can_attack(current_time):
-            return False
+            return None
             
-        target = self.find_target(enemies)
+        target = self.find_target(enemies, index)
         if target:
             target.health -= self.damage
             self.last_attack_time = current_time
-            return True
-        return False
+        return target
 
 class MeerkatScout(Tower):
     def __init__(self, x, y):
@@ -54,10 +94,11 @@ class MeerkatScout(Tower):
         self.attack_speed = 5
         self.range = 150
         self.cost = 75
+        self.reveal_time = 2000
         
     def special_ability(self):
-        # reveal hidden enemies
-        pass
+        # spots its target, every tower hits it harder for a while
+        return ((REVEAL, self.reveal_time, 0),)
 
 class ChameleonSniper(Tower):
     def __init__(self, x, y):
@@ -66,11 +107,12 @@ class ChameleonSniper(Tower):
         self.attack_speed = 2
         self.range = 250
         self.cost = 100
-        self.is_hidden = True
+        self.slow_time = 1500
+        self.slow = 0.5  # speed multiplier
         
     def special_ability(self):
-        # toggle visibility
-        self.is_hidden = not self.is_hidden
+        # sticky tongue
+        return ((SLOW, self.slow_time, self.slow),)
 
 class CrocodileChomper(Tower):
     def __init__(self, x, y):
@@ -79,7 +121,18 @@ class CrocodileChomper(Tower):
         self.attack_speed = 0.75
         self.range = 100
         self.cost = 225
+        self.stun_time = 400
+        self.bleed_time = 3000
+        self.bleed = 20  # damage per second
 
     def special_ability(self):
-        pass
+        # holds on to the target, which keeps bleeding after it lets go
+        return ((STUN, self.stun_time, 0), (DOT, self.bleed_time, self.bleed))
+
 
+# short names used by the ui and balancing scripts -> tower class
+TOWER_TYPES = {
+    "meerkat": MeerkatScout,
+    "chameleon": ChameleonSniper,
+    "crocodile": CrocodileChomper,
+}
@@ -5,8 +5,9 @@ You're welcome! This level system is fully customizable.
 Wave configuration file for Wild Defense
 Each wave is a list of enemy spawns
 Format for each spawn: (enemy_type, delay_ms)
-- enemy_type: "poacher", "deforester", or "invasive"
-- delay_ms: milliseconds to wait before spawning next enemy
+- enemy_type: "poacher", "deforester", "invasive" or "bulldozer" (any key of ENEMY_STATS)
+- delay_ms: milliseconds after the wave starts that the enemy spawns. enemies
+  that are due at the same time all spawn in the same tick
 
 Example wave:
 [
@@ -16,6 +17,8 @@ Example wave:
 ]
 """
 
+import random
+
 WAVES = [
     # Wave 1 - Simple wave with poachers
     [
@@ -121,3 +124,58 @@ ENEMY_STATS = {
         "reward": 80
     }
 }
+
+
+# Endless mode
+# waves are generated on demand, one spawn at a time, so even a 10k+ enemy wave
+# never exists as a list. each wave comes with multipliers for ENEMY_STATS
+ENDLESS_TYPES = ["poacher", "deforester", "invasive"]
+ENDLESS_BOSS_EVERY = 5  # a bulldozer leads every 5th wave
+
+
+def endless_size(number):
+    # 12 enemies on wave 1, ~1k by wave 90, 10k+ from about wave 300
+    return 8 + 4 * number + number * number // 10
+
+
+def endless_total(number):
+    # every spawn of the wave, bosses included
+    bosses = number // ENDLESS_BOSS_EVERY if number % ENDLESS_BOSS_EVERY == 0 else 0
+    return bosses + endless_size(number)
+
+
+def endless_spawns(number):
+    rng = random.Random(number)  # same wave number, same wave
+    interval = max(20, 700 - 20 * number)  # ms between spawns, tightening up
+    delay = 0
+    if number % ENDLESS_BOSS_EVERY == 0:
+        for _ in range(number // ENDLESS_BOSS_EVERY):
+            yield ("bulldozer", delay)
+            delay += 1000
+    for _ in range(endless_size(number)):
+        yield (rng.choice(ENDLESS_TYPES), delay)
+        delay += interval
+
+
+def endless_multipliers(number):
+    return {
+        "health": 1 + 0.12 * (number - 1),
+        "speed": min(2.0, 1 + 0.01 * (number - 1)),
+        "reward": 1 + 0.04 * (number - 1),
+    }
+
+
+def endless_waves(start=1):
+    # yields (spawns, stat multipliers) for wave start, start + 1, ... forever
+    number = start
+    while True:
+        yield endless_spawns(number), endless_multipliers(number)
+        number += 1
+
+
+# Stress mode
+# one wave of slow invasives that keep multiplying until the population cap,
+# tens of thousands of them on screen at once
+STRESS_SPAWNS = 2000
+STRESS_WAVES = [[("invasive", i * 2) for i in range(STRESS_SPAWNS)]]
+STRESS_STATS = dict(ENEMY_STATS, invasive=dict(ENEMY_STATS["invasive"], speed=0.3))
@@ -1,52 +1,42 @@
+import time
+STARTED = time.perf_counter()  # before the heavy imports, for the startup report
+
+import argparse
 import pygame
+import struct
 import sys
 import os
-import time
 from game.towers import MeerkatScout, ChameleonSniper, CrocodileChomper
-from game.enemies import Poacher, Deforester, InvasiveSpecies, Bulldozer
-from game.waves import WAVES, ENEMY_STATS
+from game.engine import SimulationEngine, create_engine, create_path
+from game.render import BackgroundCache, DirtyRects
+from game.effects import AttackLines
+from game.sprites import EntityRenderer, TOWER_COLORS
+from game.text_cache import TextCache
+from game.assets import ASSETS, StartupTimer
+from game.profiler import FrameProfiler
+from game.snapshot import save_snapshot, load_snapshot
+from game.coverage import suggest_placements
+from game.recording import InputRecorder, apply_input, TOWER_NAMES, SELECT, PLACE, START_WAVE, TARGETING, SELL
+from game.settings import (WINDOW_WIDTH, WINDOW_HEIGHT, FPS, GRID_SIZE, SIDEBAR_WIDTH, SPEEDS, MAX_SPEED_BUDGET,
+                           WHITE, BLACK, GREEN, BROWN, LIGHT_GREEN, GRAY, RED,
+                           BLUE, LIGHT_GRAY)
 
+startup = StartupTimer(STARTED)
+startup.mark("imports")
 pygame.init()
+startup.mark("pygame.init")
 
-WINDOW_WIDTH = 1280
-WINDOW_HEIGHT = 768
-FPS = 60
-GRID_SIZE = 64  # size of each cell
-GRID_COLS = (WINDOW_WIDTH - 250 - 64) // GRID_SIZE
-GRID_ROWS = WINDOW_HEIGHT // GRID_SIZE
-SIDEBAR_WIDTH = 250
-
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-GREEN = (34, 139, 19)
-BROWN = (139, 69, 19)
-LIGHT_GREEN = (144, 238, 144)
-GRAY = (128, 128, 128)
-RED = (255, 0, 0)
-YELLOW = (255, 255, 0)
-BLUE = (0, 191, 255)
-PURPLE = (147, 112, 219)
-LIGHT_GRAY = (200, 200, 200)
+QUICKSAVE = "quicksave.wdsv"
 
 class Game:
-    def __init__(self):
+    def __init__(self, profiler=None, record_path=None):
+        # everything in here lives for the whole process, per-game state is
+        # set up in reset()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Wild Defense")
+        startup.mark("window")
         self.clock = pygame.time.Clock()
         self.running = True
-        self.state = "menu"  # menu, game, pause, game_over
-        
-        # Game state
-        self.towers = []
-        self.enemies = []
-        self.selected_tower_type = None
-        self.money = 200
-        self.wave = 0
-        self.wave_started = False
-        self.current_wave = []  # list of (enemy_type, spawn_time) tuples
-        self.next_spawn_index = 0  # index of next enemy to spawn in current wave
-        self.wave_start_time = 0
-        self.wave_complete = False
         self.path = self.create_path()
         
         # Tower info
@@ -76,112 +66,144 @@ class Game:
         
         # load assets
         self.load_assets()
-        self.diamond_img = pygame.image.load('assets/dia.png').convert_alpha()
-        self.diamond_img = pygame.transform.scale(self.diamond_img, (50, 50))
-        
-        # base stats
-        self.base_health = 100
-        self.max_base_health = 100
         
+        # rendering: static layer + the bits of screen touched each frame
+        self.background = BackgroundCache((WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.dirty_rects = DirtyRects(self.screen.get_rect())
+        self.play_area = pygame.Rect(0, 0, WINDOW_WIDTH - SIDEBAR_WIDTH, WINDOW_HEIGHT - 100)
+        self.drawn_state = None
+        self.sprites = EntityRenderer()
+
+        # frame timings, F3 shows them on screen
+        self.profiler = profiler if profiler is not None else FrameProfiler()
+        self.show_profiler = False
+        self.profiler_surface = None
+
         # visual effects
-        self.attack_lines = []  # list of (start_pos, end_pos, time) tuples
-        self.attack_line_duration = 100  # milliseconds
+        self.attack_lines = AttackLines((WINDOW_WIDTH, WINDOW_HEIGHT), duration=100)
+
+        # input log for replays, opened once a mode is picked in the menu
+        self.record_path = record_path
+        self.recorder = None
+
+        self.reset()
+
+    def reset(self):
+        # back to the menu with a fresh game. window, assets and caches stay
+        self.state = "menu"  # menu, game, pause, game_over
+
+        # Game state (everything that isn't drawing lives in the engine)
+        self.engine = SimulationEngine(self.path)
+        self.selected_tower_type = None
+        self.show_coverage = False  # H, path coverage heatmap of the selected tower
+        self.suggestions = None  # G, ((engine id, layout version), [(tower class, col, row)])
+        self.attack_lines.clear()
+        self.background.invalidate()
+        self.dirty_rects.invalidate()
+        self.drawn_state = None
+
+        # snapshot taken right before the current wave started, for retries
+        self.wave_snapshot = None
+
+        # fast-forward, F cycles through SPEEDS. the readout is measured over
+        # half a second windows of wall time
+        self.speed_index = 0
+        self.tick_rate = 0
+        self.rate_window = (time.perf_counter(), 0)
 
     def load_assets(self):
-        # create fonts
-        self.title_font = pygame.font.Font(None, 74)
-        self.menu_font = pygame.font.Font(None, 36)
-        self.game_font = pygame.font.Font(None, 24)
+        # every draw method renders text through this cache
+        self.text = TextCache()
+
+        # fonts and images come from the process-wide cache, so a second Game
+        # (or a reset) doesn't load anything again
+        self.title_font = ASSETS.font(None, 74)
+        self.menu_font = ASSETS.font(None, 36)
+        self.game_font = ASSETS.font(None, 24)
+        self.diamond_img = ASSETS.image('assets/dia.png', (50, 50))
+        startup.mark("assets")
         
     def create_path(self):
-        path = [
-            (0, 4 * GRID_SIZE),  # start
-            (8 * GRID_SIZE, 4 * GRID_SIZE),
-            (8 * GRID_SIZE, 8 * GRID_SIZE),
-            (12 * GRID_SIZE, 8 * GRID_SIZE),  # end
-        ]
-        return path
-        
-    def spawn_enemy(self):
-        if not self.wave_started or self.wave_complete:
-            return
+        return create_path()
 
-        current_time = pygame.time.get_ticks()
-        elapsed_time = current_time - self.wave_start_time
+    def update_game(self):
+        # every speed runs the same fixed ticks, faster speeds just run several
+        # of them per rendered frame, so outcomes never depend on the speed
+        speed = SPEEDS[self.speed_index]
+        deadline = time.perf_counter() + MAX_SPEED_BUDGET
+        steps = 0
+        while self.engine.state == "running":
+            self.engine.step(self.profiler)
+            self.update_effects()
+            steps += 1
+            if steps == speed or (speed is None and time.perf_counter() >= deadline):
+                break
+            if not self.engine.wave_started:
+                break  # nothing to fast-forward between waves
+        if self.engine.state != "running":
+            self.end_game()
+        self.measure_tick_rate()
+
+    def measure_tick_rate(self):
+        now = time.perf_counter()
+        started, start_tick = self.rate_window
+        if now - started >= 0.5:
+            self.tick_rate = round((self.engine.tick - start_tick) / (now - started))
+            self.rate_window = (now, self.engine.tick)
+
+    def start_game(self, mode):
+        self.engine = create_engine(mode, self.path)
+        if self.record_path:
+            self.recorder = InputRecorder(self.record_path, mode)
+            self.record_path = None  # only the first game gets recorded
+        self.state = "game"
+
+    def end_game(self):
+        if self.recorder:
+            self.recorder.finish(self.engine)
+        self.state = "game_over"
+
+    def save_game(self, path=QUICKSAVE):
+        with open(path, "wb") as f:
+            f.write(save_snapshot(self.engine))
+
+    def load_game(self, data):
+        # swap in the saved engine directly, nothing gets replayed. an input log
+        # can't follow a jump like that, so recording stops here. a save that
+        # fails to load leaves the running game and its recording alone
+        engine = load_snapshot(data, self.path)
+        if self.recorder:
+            self.recorder.finish(self.engine)
+            self.recorder = None
+        self.engine = engine
+        self.attack_lines.clear()
+        self.suggestions = None
+        # R retries from the start of this game's wave, never one from before a quickload
+        if data is not self.wave_snapshot:
+            self.wave_snapshot = None
+        self.state = "game"
+
+    def send_input(self, kind, tower_type=0, col=0, row=0):
+        # everything the player does to the engine goes through here, so it can
+        # be logged with the tick it happened on and replayed exactly
+        if self.recorder:
+            self.recorder.record(self.engine.tick, kind, tower_type, col, row)
+        return apply_input(self.engine, kind, tower_type, col, row)
+
+    def select_tower(self, tower_type):
+        self.selected_tower_type = tower_type
+        self.send_input(SELECT, TOWER_NAMES.index(tower_type))
+
+    def update_effects(self):
+        current_time = self.engine.time
+        for tower, target in self.engine.attacks:
+            # add visual attack line
+            start_pos = (tower.x + GRID_SIZE//2, tower.y + GRID_SIZE//2)
+            end_pos = (int(target.x), int(target.y))
+            self.attack_lines.add(start_pos, end_pos, current_time)
 
-        # check if we have more enemies to spawn in this wave
-        if self.next_spawn_index < len(self.current_wave):
-            enemy_type, delay = self.current_wave[self.next_spawn_index]
-            
-            # if enough time has passed, spawn the next enemy
-            if elapsed_time >= delay:
-                stats = ENEMY_STATS[enemy_type]
-                if enemy_type == "poacher":
-                    enemy = Poacher(self.path, stats["health"], stats["speed"], stats["damage"], stats["reward"])
-                elif enemy_type == "deforester":
-                    enemy = Deforester(self.path, stats["health"], stats["speed"], stats["damage"], stats["reward"])
-                elif enemy_type == "bulldozer":
-                    enemy = Bulldozer(self.path, stats["health"], stats["speed"], stats["damage"], stats["reward"])
-                else:  # invasive
-                    enemy = InvasiveSpecies(self.path, stats["health"], stats["speed"], stats["damage"], stats["reward"])
-                
-                self.enemies.append(enemy)
-                self.next_spawn_index += 1
-        
-        # check if wave is complete
-        if self.next_spawn_index >= len(self.current_wave):
-            all_dead = True
-            for enemy in self.enemies:
-                if not enemy.dead:
-                    all_dead = False
-                    break
-            if all_dead:
-                self.wave_complete = True
-                self.wave_started = False
-
-    def start_wave(self):
-        if self.wave < len(WAVES):
-            self.current_wave = WAVES[self.wave]
-            self.wave_started = True
-            self.wave_complete = False
-            self.next_spawn_index = 0
-            self.wave_start_time = pygame.time.get_ticks()
-        else:
-            print("No more waves! You win!")
-            self.state = "game_over"
-
-    def update_enemies(self):
-        # update enemies
-        for enemy in self.enemies[:]:
-            enemy.move()
-            # check if enemy died
-            if enemy.check_death():
-                self.money += enemy.reward
-                self.enemies.remove(enemy)
-                continue
-            # remove enemy if it reaches the end
-            if enemy.path_index >= len(self.path) - 1:
-                self.base_health -= 10  # lose health when enemy reaches base
-                self.enemies.remove(enemy)
-                if self.base_health <= 0:
-                    self.state = "game_over"
-                
-    def update_towers(self):
-        current_time = pygame.time.get_ticks()
-        
-        # update towers
-        for tower in self.towers:
-            if tower.attack(current_time, self.enemies):
-                # add visual attack line
-                target = tower.find_target(self.enemies)
-                if target:
-                    start_pos = (tower.x + GRID_SIZE//2, tower.y + GRID_SIZE//2)
-                    end_pos = (int(target.x), int(target.y))
-                    self.attack_lines.append((start_pos, end_pos, current_time))
-        
         # remove old attack lines
-        self.attack_lines = [(start, end, time) for start, end, time in self.attack_lines
-                           if current_time - time < self.attack_line_duration]
+        self.attack_lines.expire(current_time)
             
     def handle_events(self):
         for event in pygame.event.get():
@@ -192,143 +214,178 @@ class Game:
                 
                 if self.state == "menu":
                     button_rect = pygame.Rect(WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2, 200, 50)
+                    endless_rect = pygame.Rect(WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2 + 80, 200, 50)
+                    maze_rect = pygame.Rect(WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2 + 160, 200, 50)
+                    stress_rect = pygame.Rect(WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2 + 240, 200, 50)
                     if button_rect.collidepoint(mouse_pos):
-                        self.state = "game"
+                        self.start_game("campaign")
+                    elif endless_rect.collidepoint(mouse_pos):
+                        self.start_game("endless")
+                    elif maze_rect.collidepoint(mouse_pos):
+                        self.start_game("maze")
+                    elif stress_rect.collidepoint(mouse_pos):
+                        self.start_game("stress")
+                
+                elif self.state == "game" and event.button == 3:
+                    # right click sells the tower under the mouse
+                    if mouse_pos[0] < WINDOW_WIDTH - SIDEBAR_WIDTH and mouse_pos[1] <= WINDOW_HEIGHT - 100:
+                        self.send_input(SELL, 0, mouse_pos[0] // GRID_SIZE, mouse_pos[1] // GRID_SIZE)
                 
                 elif self.state == "game":
                     # handle tower selection from sidebar
                     if mouse_pos[0] > WINDOW_WIDTH - SIDEBAR_WIDTH:
                         # meerkat button area
                         if 60 <= mouse_pos[1] <= 160:
-                            self.selected_tower_type = "meerkat"
+                            self.select_tower("meerkat")
                         # chameleon button area
                         elif 200 <= mouse_pos[1] <= 300:
-                            self.selected_tower_type = "chameleon"
+                            self.select_tower("chameleon")
                         # crocodile button area
                         elif 340 <= mouse_pos[1] <= 440:
-                            self.selected_tower_type = "crocodile"
+                            self.select_tower("crocodile")
                     # handle start wave button
-                    elif not self.wave_started and mouse_pos[1] > WINDOW_HEIGHT - 60 and WINDOW_WIDTH - SIDEBAR_WIDTH - 150 <= mouse_pos[0] <= WINDOW_WIDTH - SIDEBAR_WIDTH:
-                        self.wave += 1
-                        self.start_wave()
+                    elif not self.engine.wave_started and mouse_pos[1] > WINDOW_HEIGHT - 60 and WINDOW_WIDTH - SIDEBAR_WIDTH - 150 <= mouse_pos[0] <= WINDOW_WIDTH - SIDEBAR_WIDTH:
+                        self.wave_snapshot = save_snapshot(self.engine)
+                        self.send_input(START_WAVE)
+                        if self.engine.state == "won":
+                            print("No more waves! You win!")
+                            self.end_game()
                     # handle tower placement
                     elif self.selected_tower_type and mouse_pos[0] < WINDOW_WIDTH - SIDEBAR_WIDTH:
-                        grid_x = (mouse_pos[0] // GRID_SIZE) * GRID_SIZE
-                        grid_y = (mouse_pos[1] // GRID_SIZE) * GRID_SIZE
-                        
-                        # check if we can place tower here
-                        can_place = True
-                        # don't place on UI area
-                        if mouse_pos[1] > WINDOW_HEIGHT - 100:
-                            can_place = False
-                        else:
-                            for tower in self.towers:
-                                if tower.x == grid_x and tower.y == grid_y:
-                                    can_place = False
-                                    break
-                        
-                        # check if we have enough money
-                        tower_info = self.tower_types[self.selected_tower_type]
-                        if can_place and self.money >= tower_info["cost"]:
-                            self.towers.append(tower_info["class"](grid_x, grid_y))
-                            self.money -= tower_info["cost"]
+                        # don't place on UI area, the engine checks money and free cells
+                        if mouse_pos[1] <= WINDOW_HEIGHT - 100:
+                            self.send_input(PLACE, TOWER_NAMES.index(self.selected_tower_type),
+                                            mouse_pos[0] // GRID_SIZE, mouse_pos[1] // GRID_SIZE)
             
+            elif event.type == pygame.KEYDOWN and self.state == "game" and event.key == pygame.K_t:
+                # cycle the targeting mode of the tower under the mouse
+                mouse_x, mouse_y = pygame.mouse.get_pos()
+                self.send_input(TARGETING, 0, mouse_x // GRID_SIZE, mouse_y // GRID_SIZE)
+
+            elif event.type == pygame.KEYDOWN and self.state == "game" and event.key == pygame.K_h:
+                self.show_coverage = not self.show_coverage
+
+            elif event.type == pygame.KEYDOWN and self.state == "game" and event.key == pygame.K_g:
+                # where the advisor would spend the money we have right now
+                self.suggestions = ((id(self.engine), self.engine.layout_version),
+                                    suggest_placements(self.engine, self.engine.money))
+
+            elif event.type == pygame.KEYDOWN and self.state == "game" and event.key == pygame.K_F3:
+                self.show_profiler = not self.show_profiler
+
+            elif event.type == pygame.KEYDOWN and self.state == "game" and event.key == pygame.K_f:
+                self.speed_index = (self.speed_index + 1) % len(SPEEDS)
+
+            elif event.type == pygame.KEYDOWN and self.state == "game" and event.key == pygame.K_F5:
+                self.save_game()
+
+            elif event.type == pygame.KEYDOWN and self.state in ("menu", "game") and event.key == pygame.K_F9:
+                if os.path.exists(QUICKSAVE):
+                    with open(QUICKSAVE, "rb") as f:
+                        data = f.read()
+                    try:
+                        self.load_game(data)
+                    except (ValueError, struct.error) as error:
+                        print(f"can't load {QUICKSAVE}: {error}")
+
             elif event.type == pygame.KEYDOWN and self.state == "game_over":
-                # reset game
-                self.__init__()
+                if event.key == pygame.K_r and self.wave_snapshot:
+                    # back to just before the wave that was lost
+                    self.load_game(self.wave_snapshot)
+                else:
+                    # reset game
+                    self.reset()
                 
     def draw_menu(self):
         self.screen.fill(GREEN)
         
         # title
-        title_text = self.title_font.render("Wild Defense", True, WHITE)
+        title_text = self.text.render(self.title_font, "Wild Defense", WHITE)
         title_rect = title_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//4))
         self.screen.blit(title_text, title_rect)
         
         # start button
         button_rect = pygame.Rect(WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2, 200, 50)
         pygame.draw.rect(self.screen, WHITE, button_rect)
-        start_text = self.menu_font.render("Start Game", True, BLACK)
+        start_text = self.text.render(self.menu_font, "Start Game", BLACK)
         text_rect = start_text.get_rect(center=button_rect.center)
         self.screen.blit(start_text, text_rect)
+
+        # endless button
+        endless_rect = pygame.Rect(WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2 + 80, 200, 50)
+        pygame.draw.rect(self.screen, WHITE, endless_rect)
+        endless_text = self.text.render(self.menu_font, "Endless", BLACK)
+        self.screen.blit(endless_text, endless_text.get_rect(center=endless_rect.center))
+
+        # maze button
+        maze_rect = pygame.Rect(WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2 + 160, 200, 50)
+        pygame.draw.rect(self.screen, WHITE, maze_rect)
+        maze_text = self.text.render(self.menu_font, "Maze", BLACK)
+        self.screen.blit(maze_text, maze_text.get_rect(center=maze_rect.center))
+
+        # stress test button
+        stress_rect = pygame.Rect(WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2 + 240, 200, 50)
+        pygame.draw.rect(self.screen, WHITE, stress_rect)
+        stress_text = self.text.render(self.menu_font, "Stress Test", BLACK)
+        self.screen.blit(stress_text, stress_text.get_rect(center=stress_rect.center))
         
-    def draw_game(self):
-        self.screen.fill(LIGHT_GREEN)  # background clr
+    def background_key(self):
+        # anything that changes what the cached background looks like
+        return (id(self.engine), self.engine.layout_version, self.selected_tower_type,
+                self.show_coverage, self.suggestions)
+
+    def draw_background(self, surface):
+        surface.fill(LIGHT_GREEN)  # background clr
         
         # grid
         for x in range(0, WINDOW_WIDTH - SIDEBAR_WIDTH, GRID_SIZE):
-            pygame.draw.line(self.screen, GRAY, (x, 0), (x, WINDOW_HEIGHT))
+            pygame.draw.line(surface, GRAY, (x, 0), (x, WINDOW_HEIGHT))
         for y in range(0, WINDOW_HEIGHT, GRID_SIZE):
-            pygame.draw.line(self.screen, GRAY, (0, y), (WINDOW_WIDTH - SIDEBAR_WIDTH, y))
+            pygame.draw.line(surface, GRAY, (0, y), (WINDOW_WIDTH - SIDEBAR_WIDTH, y))
             
-        # path
-        for i in range(len(self.path) - 1):
-            pygame.draw.line(self.screen, BROWN, self.path[i], self.path[i + 1], 5)
-            pygame.draw.circle(self.screen, BROWN, self.path[i], 10)
+        # path (in mazes the route the enemies currently take)
+        path = self.engine.path
+        for i in range(len(path) - 1):
+            pygame.draw.line(surface, BROWN, path[i], path[i + 1], 5)
+            pygame.draw.circle(surface, BROWN, path[i], 10)
         
+        # how much path a tower of the selected type would cover from each free cell
+        if self.show_coverage:
+            tower_class = self.tower_types[self.selected_tower_type or "meerkat"]["class"]
+            radius = self.engine.build_tower(tower_class, 0, 0).range
+            values = self.engine.coverage().heatmap(radius, self.engine.occupancy.free_mask())
+            surface.blit(self.sprites.coverage_overlay(values), (0, 0))
+
+        # cells the advisor picked, outlined in the tower's colour
+        if self.suggestions:
+            for tower_class, col, row in self.suggestions[1]:
+                pygame.draw.rect(surface, TOWER_COLORS[tower_class],
+                                 (col * GRID_SIZE + 3, row * GRID_SIZE + 3, GRID_SIZE - 6, GRID_SIZE - 6), 3)
+
         # draw diamond at the end of path
-        base_x, base_y = self.path[-1]
+        base_x, base_y = path[-1]
         # center the diamond image on the base position
         diamond_rect = self.diamond_img.get_rect(center=(base_x, base_y))
-        self.screen.blit(self.diamond_img, diamond_rect)
+        surface.blit(self.diamond_img, diamond_rect)
         
-        # draw base health bar
-        health_width = 60 * (self.base_health / self.max_base_health)
-        pygame.draw.rect(self.screen, RED, (base_x - 30, base_y - 35, 60, 8))
-        pygame.draw.rect(self.screen, GREEN, (base_x - 30, base_y - 35, health_width, 8))
-        
-        # draw towers COLOR
-
-        for tower in self.towers:
-            if isinstance(tower, MeerkatScout):
-                color = RED
-            elif isinstance(tower, ChameleonSniper):
-                color = BLACK
-            elif isinstance(tower, CrocodileChomper):
-                color = GREEN
-            pygame.draw.rect(self.screen, color, 
-                           (tower.x + 5, tower.y + 5, GRID_SIZE - 10, GRID_SIZE - 10))
-            # only draw range circle if tower is selected (wow such awesome game dev skills!!)
-            if (tower.x + GRID_SIZE > pygame.mouse.get_pos()[0] > tower.x and 
-                tower.y + GRID_SIZE > pygame.mouse.get_pos()[1] > tower.y):
-                pygame.draw.circle(self.screen, GRAY, (tower.x + GRID_SIZE//2, tower.y + GRID_SIZE//2), 
-                                 tower.range, 1)
-        
-        # draw attack lines
-        current_time = pygame.time.get_ticks()
-        for start_pos, end_pos, time in self.attack_lines:
-            # make lines fade out
-            age = current_time - time
-            alpha = 255 * (1 - age / self.attack_line_duration)
-            line_color = (*RED, int(alpha))
-            line_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
-            pygame.draw.line(line_surface, line_color, start_pos, end_pos, 2)
-            self.screen.blit(line_surface, (0, 0))
-        
-        # draw enemies
-        for enemy in self.enemies:
-            if not enemy.dead:
-                pygame.draw.circle(self.screen, YELLOW, (int(enemy.x), int(enemy.y)), 15)
-                # draw health bar
-                health_width = 30 * (enemy.health / enemy.max_health)
-                pygame.draw.rect(self.screen, RED, (enemy.x - 15, enemy.y - 20, 30, 5))
-                pygame.draw.rect(self.screen, GREEN, (enemy.x - 15, enemy.y - 20, health_width, 5))
+        # draw towers
+        self.sprites.draw_towers(surface, self.engine.towers)
         
         # draw right sidebar
-        pygame.draw.rect(self.screen, WHITE, (WINDOW_WIDTH - SIDEBAR_WIDTH, 0, SIDEBAR_WIDTH, WINDOW_HEIGHT))
+        pygame.draw.rect(surface, WHITE, (WINDOW_WIDTH - SIDEBAR_WIDTH, 0, SIDEBAR_WIDTH, WINDOW_HEIGHT))
         
         # draw sidebar title
-        title_text = self.menu_font.render("Towers", True, BLACK)
-        self.screen.blit(title_text, (WINDOW_WIDTH - SIDEBAR_WIDTH + 20, 20))
+        title_text = self.text.render(self.menu_font, "Towers", BLACK)
+        surface.blit(title_text, (WINDOW_WIDTH - SIDEBAR_WIDTH + 20, 20))
         
         # draw tower options in sidebar
         y_offset = 60
         for tower_type, info in self.tower_types.items():
             # tower box
             box_rect = pygame.Rect(WINDOW_WIDTH - SIDEBAR_WIDTH + 10, y_offset, SIDEBAR_WIDTH - 20, 120)
-            pygame.draw.rect(self.screen, LIGHT_GRAY, box_rect)
+            pygame.draw.rect(surface, LIGHT_GRAY, box_rect)
             if self.selected_tower_type == tower_type:
-                pygame.draw.rect(self.screen, BLUE, box_rect, 3)
+                pygame.draw.rect(surface, BLUE, box_rect, 3)
             
             # tower icon
             if tower_type == "meerkat":
@@ -337,62 +394,107 @@ class Game:
                 icon_color = BLACK
             elif tower_type == "crocodile":
                 icon_color = GREEN
-            pygame.draw.rect(self.screen, icon_color,
+            pygame.draw.rect(surface, icon_color,
                            (WINDOW_WIDTH - SIDEBAR_WIDTH + 20, y_offset + 10, 40, 40))
             
             # tower name and cost
-            name_text = self.game_font.render(info["name"], True, BLACK)
-            cost_text = self.game_font.render(f"Cost: ${info['cost']}", True, BLACK)
-            self.screen.blit(name_text, (WINDOW_WIDTH - SIDEBAR_WIDTH + 70, y_offset + 10))
-            self.screen.blit(cost_text, (WINDOW_WIDTH - SIDEBAR_WIDTH + 70, y_offset + 30))
+            name_text = self.text.render(self.game_font, info["name"], BLACK)
+            cost_text = self.text.render(self.game_font, f"Cost: ${info['cost']}", BLACK)
+            surface.blit(name_text, (WINDOW_WIDTH - SIDEBAR_WIDTH + 70, y_offset + 10))
+            surface.blit(cost_text, (WINDOW_WIDTH - SIDEBAR_WIDTH + 70, y_offset + 30))
             
             # tower stats
             for i, stat in enumerate(info["stats"]):
-                stat_text = self.game_font.render(stat, True, BLACK)
-                self.screen.blit(stat_text, (WINDOW_WIDTH - SIDEBAR_WIDTH + 20, y_offset + 60 + i * 20))
+                stat_text = self.text.render(self.game_font, stat, BLACK)
+                surface.blit(stat_text, (WINDOW_WIDTH - SIDEBAR_WIDTH + 20, y_offset + 60 + i * 20))
             
             y_offset += 160
         
         # draw bottom UI (money, wave, health)
-        pygame.draw.rect(self.screen, WHITE, (0, WINDOW_HEIGHT - 100, WINDOW_WIDTH - SIDEBAR_WIDTH, 100))
+        pygame.draw.rect(surface, WHITE, (0, WINDOW_HEIGHT - 100, WINDOW_WIDTH - SIDEBAR_WIDTH, 100))
+
+    def draw_game(self):
+        engine = self.engine
+        screen = self.screen
+        dirty = self.dirty_rects
+
+        # advice is only good for the layout it was made for
+        if self.suggestions and self.suggestions[0] != (id(engine), engine.layout_version):
+            self.suggestions = None
+
+        background, rebuilt = self.background.get(self.background_key(), self.draw_background)
+        dirty.restore(screen, background, rebuilt)
+
+        # the playfield sits under the sidebar and hud, keep entities inside it
+        screen.set_clip(self.play_area)
+
+        # draw base health bar
+        base_x, base_y = engine.path[-1]
+        health_width = 60 * (engine.base_health / engine.max_base_health)
+        dirty.add(pygame.draw.rect(screen, RED, (base_x - 30, base_y - 35, 60, 8)))
+        pygame.draw.rect(screen, GREEN, (base_x - 30, base_y - 35, health_width, 8))
+
+        # only draw range circle if tower is selected (wow such awesome game dev skills!!)
+        mouse_x, mouse_y = pygame.mouse.get_pos()
+        for tower in engine.towers:
+            if (tower.x + GRID_SIZE > mouse_x > tower.x and 
+                tower.y + GRID_SIZE > mouse_y > tower.y):
+                dirty.add(pygame.draw.circle(screen, GRAY, (tower.x + GRID_SIZE//2, tower.y + GRID_SIZE//2), 
+                                             tower.range, 1))
+                mode_text = self.text.render(self.game_font, f"Target: {tower.targeting} (T)", BLACK)
+                dirty.add(screen.blit(mode_text, (tower.x, tower.y - 20)))
+
+        # green/red preview of the cell a tower would go on
+        if self.selected_tower_type and self.play_area.collidepoint(mouse_x, mouse_y):
+            grid_x = (mouse_x // GRID_SIZE) * GRID_SIZE
+            grid_y = (mouse_y // GRID_SIZE) * GRID_SIZE
+            valid = engine.can_place(self.tower_types[self.selected_tower_type]["class"], grid_x, grid_y)
+            dirty.add(screen.blit(self.sprites.placement_marker(valid), (grid_x, grid_y)))
+        
+        # draw attack lines
+        dirty.add(self.attack_lines.draw(screen, engine.time))
+        
+        # draw enemies (pre-rendered bodies and health bars, one blits call)
+        dirty.extend(self.sprites.draw_enemies(screen, engine.enemies, engine.tick))
+
+        screen.set_clip(None)
         
         # draw money and wave info
-        money_text = self.game_font.render(f"Money: ${self.money}", True, BLACK)
-        wave_text = self.game_font.render(f"Wave: {self.wave}", True, BLACK)
-        health_text = self.game_font.render(f"Base Health: {self.base_health}", True, BLACK)
-        self.screen.blit(money_text, (20, WINDOW_HEIGHT - 50))
-        self.screen.blit(wave_text, (20, WINDOW_HEIGHT - 80))
-        self.screen.blit(health_text, (200, WINDOW_HEIGHT - 50))
+        money_text = self.text.render(self.game_font, f"Money: ${engine.money}", BLACK)
+        wave_text = self.text.render(self.game_font, f"Wave: {engine.wave}", BLACK)
+        health_text = self.text.render(self.game_font, f"Base Health: {engine.base_health}", BLACK)
+        dirty.add(screen.blit(money_text, (20, WINDOW_HEIGHT - 50)))
+        dirty.add(screen.blit(wave_text, (20, WINDOW_HEIGHT - 80)))
+        dirty.add(screen.blit(health_text, (200, WINDOW_HEIGHT - 50)))
+        speed = SPEEDS[self.speed_index]
+        speed_text = self.text.render(self.game_font, f"Speed: {f'{speed}x' if speed else 'max'} (F)  "
+                                      f"{self.tick_rate} ticks/s", BLACK)
+        dirty.add(screen.blit(speed_text, (200, WINDOW_HEIGHT - 80)))
         
         # draw wave status
-        if self.wave < len(WAVES):
-            if not self.wave_started:
-                wave_text = f"Wave {self.wave + 1} - Click Start Wave to begin!"
-            else:
-                enemies_left = len(self.current_wave) - self.next_spawn_index
-                for enemy in self.enemies:
-                    if not enemy.dead:
-                        enemies_left += 1
-                wave_text = f"Wave {self.wave + 1} - {enemies_left} enemies remaining"
+        if engine.wave_started:
+            wave_text = f"Wave {engine.wave} - {engine.enemies_remaining()} enemies remaining"
+        elif engine.has_more_waves():
+            wave_text = f"Wave {engine.wave + 1} - Click Start Wave to begin!"
         else:
             wave_text = "All waves complete!"
         
-        wave_text_surface = self.game_font.render(wave_text, True, BLACK)
-        self.screen.blit(wave_text_surface, (400, WINDOW_HEIGHT - 50))
+        wave_text_surface = self.text.render(self.game_font, wave_text, BLACK)
+        dirty.add(screen.blit(wave_text_surface, (400, WINDOW_HEIGHT - 50)))
         
         # draw start wave button
-        if not self.wave_started:
+        if not engine.wave_started:
             start_wave_rect = pygame.Rect(WINDOW_WIDTH - SIDEBAR_WIDTH - 150, WINDOW_HEIGHT - 60, 140, 50)
-            pygame.draw.rect(self.screen, GREEN, start_wave_rect)
-            start_text = self.game_font.render("Start Wave", True, WHITE)
+            dirty.add(pygame.draw.rect(screen, GREEN, start_wave_rect))
+            start_text = self.text.render(self.game_font, "Start Wave", WHITE)
             text_rect = start_text.get_rect(center=start_wave_rect.center)
-            self.screen.blit(start_text, text_rect)
+            screen.blit(start_text, text_rect)
         
     def draw_game_over(self):
         self.screen.fill(BLACK)
-        game_over_text = self.title_font.render("Game Over!", True, RED)
-        wave_text = self.menu_font.render(f"You survived {self.wave} waves", True, WHITE)
-        restart_text = self.menu_font.render("Press any key to restart", True, WHITE)
+        game_over_text = self.text.render(self.title_font, "Game Over!", RED)
+        wave_text = self.text.render(self.menu_font, f"You survived {self.engine.wave} waves", WHITE)
+        restart_text = self.text.render(self.menu_font, "Press R to retry the wave, any other key to restart", WHITE)
         
         self.screen.blit(game_over_text, 
                         game_over_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//3)))
@@ -401,27 +503,67 @@ class Game:
         self.screen.blit(restart_text, 
                         restart_text.get_rect(center=(WINDOW_WIDTH//2, 2*WINDOW_HEIGHT//3)))
         
+    def draw_profiler(self):
+        # the numbers only get re-rendered a few times a second, they'd be
+        # unreadable at 60 updates a second anyway. they skip the text cache on
+        # purpose, they'd only push the steady hud strings out of it
+        if self.profiler_surface is None or self.profiler.frame % 10 == 0:
+            lines = self.profiler.summary()
+            line_height = self.game_font.get_linesize()
+            self.profiler_surface = pygame.Surface((430, line_height * len(lines) + 10), pygame.SRCALPHA)
+            self.profiler_surface.fill((0, 0, 0, 180))
+            for i, line in enumerate(lines):
+                text = self.game_font.render(line, True, WHITE)
+                self.profiler_surface.blit(text, (5, 5 + i * line_height))
+        self.dirty_rects.add(self.screen.blit(self.profiler_surface, (10, 10)))
+
     def run(self):
+        profiler = self.profiler
         while self.running:
-            self.handle_events()
+            profiler.begin_frame()
+            profiler.measure("handle_events", self.handle_events)
+
+            if self.state != self.drawn_state:
+                # coming from another screen, everything has to be redrawn
+                self.dirty_rects.invalidate()
+                self.drawn_state = self.state
             
             # update game state
             if self.state == "menu":
                 self.draw_menu()
             elif self.state == "game":
-                self.spawn_enemy()
-                self.update_enemies()
-                self.update_towers()
-                self.draw_game()
+                self.update_game()
+                profiler.measure("draw_game", self.draw_game)
+                if self.show_profiler:
+                    self.draw_profiler()
             elif self.state == "game_over":
                 self.draw_game_over()
-                
-            pygame.display.flip()
+
+            if self.state == "game":
+                # only push the parts of the screen that actually changed
+                profiler.measure("display", pygame.display.update, self.dirty_rects.flush())
+            else:
+                profiler.measure("display", pygame.display.flip)
+            profiler.end_frame(enemies=self.engine.enemies.count, towers=len(self.engine.towers),
+                               effects=len(self.attack_lines), texts=len(self.text))
+            if not startup.finished:
+                startup.finish("first frame")
+                print(startup.report(ASSETS.load_times))
             self.clock.tick(FPS)
             
+        if self.recorder:
+            # quitting mid game still leaves a log that can be replayed
+            self.recorder.finish(self.engine)
+        profiler.close()
+        print(self.text.report())
         pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Wild Defense")
+    parser.add_argument("--profile-csv", metavar="FILE", help="stream per-frame timings to a csv file")
+    parser.add_argument("--record", metavar="FILE", help="log every input of the first game for replay.py")
+    args = parser.parse_args()
+
+    game = Game(FrameProfiler(csv_path=args.profile_csv), args.record)
     game.run()
@@ -0,0 +1,67 @@
+import argparse
+import sys
+import time
+
+from game.engine import create_engine
+from game.recording import read_log, apply_input, final_state, STATES
+
+# replays an input log written by `python main.py --record FILE` without a
+# window, as fast as the simulation can step, and checks the game ends up in
+# exactly the state the recording finished in
+#
+#   python replay.py game.wdrl
+#   python replay.py game.wdrl --verbose
+
+FIELDS = ("tick", "money", "base_health", "wave", "kills", "leaks", "state")
+
+
+def replay(mode, inputs, end=None, verbose=False):
+    engine = create_engine(mode)
+
+    for tick, kind, tower_type, col, row in inputs:
+        # inputs were handled before the tick they are stamped with ran
+        while engine.tick < tick and engine.state == "running":
+            engine.step()
+        result = apply_input(engine, kind, tower_type, col, row)
+        if verbose:
+            print(f"tick {tick:7d}  kind {kind}  type {tower_type}  cell {col},{row}  -> {result}")
+
+    last_tick = end[0] if end else engine.tick
+    while engine.tick < last_tick and engine.state == "running":
+        engine.step()
+    return engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded input log headless and verify the result.")
+    parser.add_argument("log", help="input log written by main.py --record")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every input as it is applied")
+    args = parser.parse_args(argv)
+
+    mode, inputs, end = read_log(args.log)
+    start = time.perf_counter()
+    engine = replay(mode, inputs, end, args.verbose)
+    elapsed = time.perf_counter() - start
+
+    print(f"{mode} game, {len(inputs)} inputs, {engine.tick} ticks in {elapsed:.2f}s "
+          f"({engine.tick / max(elapsed, 1e-9):,.0f} ticks/s)")
+    if end is None:
+        print("log has no end record (game crashed?), nothing to verify")
+        return 0
+
+    mismatches = 0
+    for field, expected, actual in zip(FIELDS, end, final_state(engine)):
+        if field == "state":
+            expected, actual = STATES[expected], STATES[actual]
+        flag = "" if expected == actual else "  MISMATCH"
+        mismatches += bool(flag)
+        print(f"  {field:<12} {expected!s:>10} {actual!s:>10}{flag}")
+    if mismatches:
+        print(f"replay diverged in {mismatches} field(s)")
+        return 1
+    print("replay matches the recording")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
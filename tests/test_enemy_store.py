@@ -0,0 +1,49 @@
+import numpy as np
+from game.engine import create_path
+from game.enemies import Poacher
+from game.enemy_store import EnemyStore
+from game.spatial import SpatialHash
+from game.targeting import batch_targets
+from game.towers import MeerkatScout, TARGETING_MODES
+
+
+def test_setting_distance_moves_the_enemy():
+    enemy = Poacher(create_path())
+    assert enemy.x == 0.0
+    enemy.distance = 300
+    assert (enemy.x, enemy.y) == (300.0, 256.0)
+    assert enemy.store.by_progress().tolist() == [0]
+
+
+def test_handle_goes_stale_after_release_and_reuse():
+    store = EnemyStore(create_path())
+    enemy = store.spawn(Poacher, 50, 2, 5, 10)
+    handle = enemy.handle
+    assert store.resolve(handle) is enemy
+
+    store.remove(np.array([True]))
+    assert store.resolve(handle) is None
+
+    reused = store.spawn(Poacher, 50, 2, 5, 10)
+    assert reused is enemy  # the same object back from the pool
+    assert store.resolve(handle) is None
+    assert store.resolve(reused.handle) is reused
+
+
+def test_ties_go_to_the_earliest_spawned_after_removals():
+    store = EnemyStore(create_path())
+    first, doomed, second, third = store.spawn_many(Poacher, 4, 50, 2, 5, 10, 100.0)
+    store.remove(np.array([False, True, False, False]))  # third swaps into doomed's slot
+    assert store[1] is third
+
+    assert [store[slot] for slot in store.by_progress().tolist()] == [first, second, third]
+    assert [store[slot] for slot in store.by_progress(last=True).tolist()] == [first, second, third]
+
+    tower = MeerkatScout(100 - 32, 256 - 32)  # centred on the enemies
+    index = SpatialHash()
+    index.rebuild(store)
+    for mode in TARGETING_MODES:
+        tower.targeting = mode
+        assert tower.find_target(store) is first
+        assert tower.find_target(store, index) is first
+        assert store[batch_targets([tower], store)[0]] is first
@@ -0,0 +1,50 @@
+import random
+from game.flowfield import FlowField
+
+COLS, ROWS = 15, 10
+SPAWN, BASE = (0, 4), (12, 8)
+
+
+def rebuilt(field):
+    # the same blocked cells, worked out from scratch
+    fresh = FlowField(field.cols, field.rows, SPAWN, BASE)
+    fresh.blocked = list(field.blocked)
+    fresh.rebuild()
+    return fresh
+
+
+def assert_same(field, fresh):
+    assert field.dist == fresh.dist
+    assert field.next.tolist() == fresh.next.tolist()
+    assert field.target_x.tolist() == fresh.target_x.tolist()
+    assert field.target_y.tolist() == fresh.target_y.tolist()
+
+
+def test_incremental_edits_match_rebuild():
+    rng = random.Random(0)
+    field = FlowField(COLS, ROWS, SPAWN, BASE)
+    towers = set()
+    for _ in range(3000):
+        col, row = rng.randrange(COLS), rng.randrange(ROWS)
+        if (col, row) in towers and rng.random() < 0.6:
+            field.unblock(col, row)
+            towers.discard((col, row))
+        else:
+            keep = [(rng.randrange(COLS), rng.randrange(ROWS)) for _ in range(rng.randrange(4))]
+            if field.block(col, row, keep):
+                towers.add((col, row))
+        assert_same(field, rebuilt(field))
+
+
+def test_refused_block_leaves_field_untouched():
+    field = FlowField(COLS, ROWS, SPAWN, BASE)
+    # wall off the base except for one cell, then try to close that one too
+    for row in range(ROWS):
+        if row != 8:
+            assert field.block(10, row)
+    before = (list(field.dist), field.next.tolist(), list(field.blocked))
+    assert not field.block(10, 8)
+    assert (list(field.dist), field.next.tolist(), list(field.blocked)) == before
+    assert not field.block(10, 8, commit=False)
+    assert field.block(5, 0, commit=False)
+    assert not field.blocked[field.cell(5, 0)]
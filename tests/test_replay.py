@@ -0,0 +1,53 @@
+import pytest
+import replay
+from game.engine import create_engine, MODES
+from game.recording import InputRecorder, apply_input, read_log, PLACE, START_WAVE, TARGETING, SELL
+
+# (tick, kind, tower type, col, row), the way main.Game.send_input logs them
+SCRIPT = [
+    (0, PLACE, 0, 3, 2),
+    (0, PLACE, 1, 5, 5),
+    (0, START_WAVE, 0, 0, 0),
+    (120, PLACE, 2, 6, 6),
+    (300, TARGETING, 0, 5, 5),
+    (450, SELL, 0, 3, 2),
+    (450, PLACE, 0, 9, 6),
+    (900, START_WAVE, 0, 0, 0),
+    (1000, PLACE, 1, 10, 9),
+]
+END_TICK = 1500
+
+
+def record(path, mode):
+    engine = create_engine(mode)
+    recorder = InputRecorder(path, mode)
+    for tick, kind, tower_type, col, row in SCRIPT:
+        while engine.tick < tick and engine.state == "running":
+            engine.step()
+        recorder.record(engine.tick, kind, tower_type, col, row)
+        apply_input(engine, kind, tower_type, col, row)
+    while engine.tick < END_TICK and engine.state == "running":
+        engine.step()
+    recorder.finish(engine)
+    return engine
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_recording_replays_to_the_same_end_state(tmp_path, mode):
+    log = tmp_path / "game.wdrl"
+    engine = record(str(log), mode)
+    assert engine.towers and engine.kills + engine.enemies.count > 0  # stress invasives are slow
+
+    assert replay.main([str(log)]) == 0
+    log_mode, inputs, end = read_log(str(log))
+    assert log_mode == mode and len(inputs) == len(SCRIPT)
+    assert replay.replay(log_mode, inputs, end).tick == engine.tick
+
+
+def test_diverging_replay_is_reported(tmp_path):
+    log = tmp_path / "game.wdrl"
+    record(str(log), "campaign")
+    data = bytearray(log.read_bytes())
+    data[-2] ^= 1  # the recorded leak count no longer matches
+    log.write_bytes(bytes(data))
+    assert replay.main([str(log)]) == 1
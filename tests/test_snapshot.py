@@ -0,0 +1,51 @@
+import pytest
+from game.engine import create_engine, MODES
+from game.recording import final_state
+from game.settings import GRID_SIZE
+from game.snapshot import save_snapshot, load_snapshot
+from game.towers import TOWER_TYPES
+from game.waves import endless_waves
+
+TOWERS = [((3, 2), "meerkat"), ((5, 5), "chameleon"), ((6, 6), "crocodile"), ((9, 6), "meerkat"),
+          ((10, 9), "chameleon")]
+
+
+def mid_wave(mode):
+    engine = create_engine(mode)
+    engine.money = 10 ** 6
+    for (col, row), name in TOWERS:
+        assert engine.place_tower(TOWER_TYPES[name], col * GRID_SIZE, row * GRID_SIZE) is not None
+    assert engine.start_wave()
+    for _ in range(400):
+        engine.step()
+    assert engine.wave_started and engine.enemies.count > 0
+    return engine
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_mid_wave_save_load_steps_identically(mode):
+    engine = mid_wave(mode)
+    data = save_snapshot(engine)
+    restored = load_snapshot(data)
+    assert save_snapshot(restored) == data
+
+    for _ in range(600):
+        engine.step()
+        restored.step()
+        assert restored.enemies.count == engine.enemies.count
+    assert final_state(restored) == final_state(engine)
+    assert save_snapshot(restored) == save_snapshot(engine)
+
+
+def test_rejects_other_data():
+    with pytest.raises(ValueError):
+        load_snapshot(b"WDRL" + bytes(64))
+
+
+def test_mode_is_what_the_engine_was_created_as():
+    engine = create_engine("stress", waves=[[("invasive", 0)]])
+    assert engine.mode == "stress"
+    assert load_snapshot(save_snapshot(engine)).mode == "stress"
+    assert create_engine("maze", waves=endless_waves()).mode == "maze"
+    with pytest.raises(ValueError):
+        create_engine("survival")
@@ -0,0 +1,25 @@
+import pytest
+from game.engine import create_engine
+from game.settings import GRID_SIZE
+from game.towers import CrocodileChomper, MeerkatScout
+from game.waves import ENEMY_STATS
+
+HEALTH = 10 ** 5  # never dies, so every point of damage is still on the books
+
+
+def test_bleed_is_credited_to_the_tower_that_applied_it():
+    stats = dict(ENEMY_STATS, bulldozer=dict(ENEMY_STATS["bulldozer"], health=HEALTH))
+    engine = create_engine("campaign", waves=[[("bulldozer", 0)]], enemy_stats=stats)
+    engine.money = 10 ** 6
+    croc = engine.place_tower(CrocodileChomper, 7 * GRID_SIZE, 2 * GRID_SIZE)
+    assert croc and engine.place_tower(MeerkatScout, 5 * GRID_SIZE, 5 * GRID_SIZE)
+    engine.start_wave()
+
+    bites = 0
+    while engine.wave_started:
+        engine.step()
+        bites += sum(tower is croc for tower, _ in engine.attacks)
+        if engine.enemies.count:
+            lost = HEALTH - engine.enemies[0].health
+            assert sum(engine.damage_dealt.values()) == pytest.approx(lost)
+    assert bites and engine.damage_dealt["CrocodileChomper"] > bites * croc.damage * 1.25  # bites plus bleed
@@ -0,0 +1,64 @@
+import pytest
+from game.engine import create_engine
+from game.enemies import ENEMY_TYPES
+from game.settings import GRID_SIZE
+from game.targeting import batch_targets
+from game.towers import TOWER_TYPES, TARGETING_MODES, MeerkatScout
+
+TOWERS = [((3, 2), "meerkat"), ((5, 5), "chameleon"), ((6, 6), "crocodile"), ((9, 6), "meerkat"),
+          ((10, 9), "chameleon"), ((4, 6), "crocodile"), ((2, 5), "chameleon")]
+TICKS = 2000
+
+
+def build(mode, targeting, **options):
+    engine = create_engine(mode, **options)
+    engine.money = 10 ** 6
+    for (col, row), name in TOWERS:
+        tower = engine.place_tower(TOWER_TYPES[name], col * GRID_SIZE, row * GRID_SIZE)
+        assert tower is not None
+        tower.targeting = targeting
+    return engine
+
+
+def attacks(engine):
+    # every attack this tick as (tower, enemy), comparable across engines
+    return [(engine.towers.index(tower), target.handle) for tower, target in engine.attacks]
+
+
+@pytest.mark.parametrize("mode", ("campaign", "maze", "endless"))
+@pytest.mark.parametrize("targeting", TARGETING_MODES)
+def test_batched_pass_matches_per_tower_pass(mode, targeting):
+    batched = build(mode, targeting)
+    per_tower = build(mode, targeting, batch_targeting=False)
+    hits = 0
+    for _ in range(TICKS):
+        for engine in (batched, per_tower):
+            if not engine.wave_started:
+                engine.start_wave()
+            engine.step()
+        assert attacks(batched) == attacks(per_tower)
+        hits += len(batched.attacks)
+        assert batched.enemies.health[:batched.enemies.count].tolist() == \
+            per_tower.enemies.health[:per_tower.enemies.count].tolist()
+    assert hits > 0
+    assert batched.damage_dealt == per_tower.damage_dealt
+    assert (batched.kills, batched.leaks, batched.money) == (per_tower.kills, per_tower.leaks, per_tower.money)
+
+
+def test_maze_progress_is_distance_to_base():
+    # a rerouted enemy that walked further is still behind one nearer the base
+    engine = create_engine("maze")
+    store = engine.enemies
+    ahead, detoured = store.spawn_many(ENEMY_TYPES["poacher"], 2, 50, 2, 5, 10, 0.0)
+    for enemy, (col, row), walked in ((ahead, (11, 8), 100.0), (detoured, (10, 8), 1000.0)):
+        store.x[enemy.slot] = (col + 0.5) * GRID_SIZE
+        store.y[enemy.slot] = (row + 0.5) * GRID_SIZE
+        enemy.distance = walked
+
+    tower = MeerkatScout(10 * GRID_SIZE, 7 * GRID_SIZE)
+    engine.spatial.rebuild(store)
+    for targeting, expected in (("first", ahead), ("last", detoured)):
+        tower.targeting = targeting
+        assert tower.find_target(store) is expected
+        assert tower.find_target(store, engine.spatial) is expected
+        assert store[batch_targets([tower], store)[0]] is expected
@@ -0,0 +1,58 @@
+import pytest
+from game.engine import create_engine
+from game.settings import GRID_SIZE, TICK_MS
+from game.towers import TOWER_TYPES
+
+TOWERS = [((3, 2), "meerkat"), ((5, 5), "chameleon"), ((6, 6), "crocodile"), ((9, 6), "meerkat"),
+          ((10, 9), "chameleon"), ((4, 6), "crocodile"), ((2, 5), "chameleon")]
+TICKS = 2000
+
+
+class PollingScheduler:
+    # the old rule: every tick, every tower whose can_attack passes
+    def __init__(self):
+        self.towers = []
+
+    def add(self, tower):
+        self.towers.append(tower)
+
+    def remove(self, tower):
+        self.towers.remove(tower)
+
+    def due(self, tick, store):
+        return [tower for tower in self.towers if tower.can_attack(tick * TICK_MS)]
+
+    def schedule(self, tower):
+        pass
+
+    def park(self, tower):
+        pass
+
+
+def fired(engine):
+    return [(tower.x, tower.y, target.handle) for tower, target in engine.attacks]
+
+
+@pytest.mark.parametrize("mode", ("campaign", "maze", "endless"))
+@pytest.mark.parametrize("batch_targeting", (True, False))
+def test_scheduler_fires_on_the_same_ticks_as_polling(mode, batch_targeting):
+    scheduled = create_engine(mode, batch_targeting=batch_targeting)
+    polled = create_engine(mode, batch_targeting=batch_targeting)
+    polled.scheduler = PollingScheduler()
+    hits = 0
+    for tick in range(TICKS):
+        for engine in (scheduled, polled):
+            engine.money = 10 ** 6
+            if tick == 0:
+                for (col, row), name in TOWERS:
+                    assert engine.place_tower(TOWER_TYPES[name], col * GRID_SIZE, row * GRID_SIZE)
+            elif tick == 900:
+                # a sold tower must stop firing, a new one join in
+                engine.sell_tower(5 * GRID_SIZE, 5 * GRID_SIZE)
+                assert engine.place_tower(TOWER_TYPES["meerkat"], 7 * GRID_SIZE, 2 * GRID_SIZE)
+            if not engine.wave_started:
+                engine.start_wave()
+            engine.step()
+        assert fired(scheduled) == fired(polled)
+        hits += len(scheduled.attacks)
+    assert hits > 0